@@ -8,14 +8,48 @@ if hasattr(os, 'add_dll_directory'):
 
 import darkdetect
 import re
-from io import BytesIO
+import csv
+import json
+import argparse
+import xml.parsers.expat
+import hashlib
+import threading
+import queue
+import signal
+import time
+import math
+import ctypes
+import statistics
+from datetime import datetime
+import multiprocessing
+import gzip
+import bz2
+import lzma
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import chain, islice
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+from urllib.request import url2pathname
+from io import BytesIO, TextIOWrapper
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
 from lxml import etree
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
 from PySide6.QtWidgets import (QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QWidget, QTextEdit,
                                QPlainTextEdit, QPushButton, QSplitter, QFileDialog, QGroupBox, QMenu, QLabel,
-                               QLineEdit)
+                               QLineEdit, QAbstractScrollArea, QToolTip, QInputDialog, QDockWidget, QTreeView,
+                               QMessageBox, QTreeWidget, QTreeWidgetItem)
 from PySide6.QtGui import (QFont, QColor, QTextCharFormat, QTextCursor, QPainter, QIcon,
                            QKeySequence, QAction, QSyntaxHighlighter, QClipboard, QTextDocument, QShortcut)
-from PySide6.QtCore import Qt, QRect, QSize, Signal, QTimer, QRegularExpression
+from PySide6.QtCore import (Qt, QRect, QSize, Signal, QTimer, QRegularExpression, QObject, QRunnable, QThreadPool,
+                            QFileSystemWatcher, QEvent, QPoint, QAbstractItemModel, QModelIndex)
 from saxonche import PySaxonProcessor
 from pygments.lexers import XmlLexer
 from pygments.styles import get_style_by_name
@@ -27,16 +61,1373 @@ MAX_LINE_LENGTH_FOR_AUTO_FORMAT = 100000
 MAX_HIGHLIGHT_CHARS = 2000000
 MAX_SEARCH_MATCHES = 1000
 MESSAGE_LENGTH = 10000
+IDENTIFYING_ATTRIBUTES = ('id', 'ID', 'type', 'name', 'key')
+XSLT_NAMESPACE = "http://www.w3.org/1999/XSL/Transform"
+MAX_CACHED_STYLESHEETS = 8
+XSD_NAMESPACE = "http://www.w3.org/2001/XMLSchema"
+TRANSFORM_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))
+TRANSFORM_MEMORY_LIMIT_MB = 2048
+TRANSFORM_CPU_TIME_LIMIT = 120
+TRANSFORM_WORKER_STARTUP_TIMEOUT = 60
+TRANSFORM_RESULT_CHUNK_SIZE = 1024 * 1024
+PARTITION_CHUNK_RECORDS = 1000
+SERVICE_DEFAULT_PORT = 8765
+SERVICE_QUEUE_LIMIT = 16
+SERVICE_MAX_REQUEST_BYTES = 256 * 1024 * 1024
+SERVICE_LATENCY_SAMPLES = 1000
+DIAGNOSTIC_MARKER_WIDTH = 8
+FOLD_INDEX_DELAY_MS = 1000
+LINT_DELAY_MS = 800
+OUTLINE_FETCH_BATCH = 500
+OUTLINE_REBUILD_DELAY_MS = 1500
+OUTLINE_SYNC_DELAY_MS = 300
+SYMBOL_LIST_DELAY_MS = 1000
+PARSE_CHUNK_SIZE = 1024 * 1024
+DIFF_MAX_COST = 1000000
+MAX_DIAGNOSTICS = 1000
+COMPRESSION_OPENERS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+COMPRESSED_XML_PATTERNS = "*.xml.gz *.xml.bz2 *.xml.xz"
+BENCHMARK_RUNS = 20
+BENCHMARK_WARMUP_RUNS = 3
+BENCHMARK_HISTORY_FILE = os.path.join(os.path.expanduser('~'), '.xslt_tester_benchmarks.jsonl')
 
 # --- Helper Functions ---
-def format_xml_string(xml_str):
-    """Parses and pretty-prints an XML string, preserving specific entities."""
-    text_with_placeholder = xml_str.replace("&#10;", NEWLINE_PLACEHOLDER)
+def format_xml_string(xml_str, xml_file=None):
+    """Parses and pretty-prints an XML string (or the XML file xml_file), preserving specific entities."""
     parser = etree.XMLParser(remove_blank_text=True, recover=True)
-    root = etree.fromstring(text_with_placeholder.encode('utf-8'), parser)
+    if xml_file is not None and not file_contains(xml_file, b"&#10;"):
+        # Nothing to preserve, so libxml2 reads the file itself.
+        root = etree.parse(xml_file, parser).getroot()
+        placeholder = False
+    else:
+        if xml_file is not None:
+            with open(xml_file, 'rb') as f:
+                data = f.read().replace(b"&#10;", NEWLINE_PLACEHOLDER.encode('ascii'))
+        else:
+            data = xml_str.replace("&#10;", NEWLINE_PLACEHOLDER).encode('utf-8')
+        root = etree.fromstring(data, parser)
+        placeholder = True
+    if root is None:
+        raise ValueError("No XML element found to format.")
     formatted_xml = etree.tostring(root, pretty_print=True, encoding='unicode')
+    if not placeholder:
+        return formatted_xml
     return formatted_xml.replace(NEWLINE_PLACEHOLDER, "&#10;")
 
+def file_contains(path, needle):
+    """Reports whether a file contains needle, reading it in chunks."""
+    tail = b""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(PARSE_CHUNK_SIZE), b''):
+            if needle in tail + chunk:
+                return True
+            tail = chunk[1 - len(needle):]
+    return False
+
+def file_equals_stripped(path, expected):
+    """Compares a file with bytes, ignoring surrounding whitespace, reading the file in chunks."""
+    expected = expected.strip()
+    with open(path, 'rb') as f:
+        start = 0
+        while True:
+            chunk = f.read(PARSE_CHUNK_SIZE)
+            stripped = chunk.lstrip()
+            start += len(chunk) - len(stripped)
+            if stripped or not chunk:
+                break
+        end = os.fstat(f.fileno()).st_size
+        while end > start:
+            f.seek(max(start, end - PARSE_CHUNK_SIZE))
+            chunk = f.read(end - f.tell())
+            stripped = chunk.rstrip()
+            end -= len(chunk) - len(stripped)
+            if stripped:
+                break
+        if end - start != len(expected):
+            return False
+        f.seek(start)
+        with memoryview(expected) as view:
+            for offset in range(0, len(expected), PARSE_CHUNK_SIZE):
+                part = view[offset:offset + PARSE_CHUNK_SIZE]
+                if f.read(len(part)) != part:
+                    return False
+    return True
+
+def canonicalize_xml_for_diff(xml_str):
+    """Pretty-prints XML with sorted attributes and stripped whitespace so that only meaningful changes remain."""
+    parser = etree.XMLParser(remove_blank_text=True, recover=True)
+    root = etree.fromstring(xml_str.encode('utf-8'), parser)
+    if root is None:
+        return xml_str
+    for elem in root.iter():
+        if elem.text is not None:
+            elem.text = elem.text.strip() or None
+        if elem.tail is not None:
+            elem.tail = elem.tail.strip() or None
+        if isinstance(elem.tag, str) and len(elem.attrib) > 1:
+            attributes = sorted(elem.attrib.items())
+            elem.attrib.clear()
+            for key, value in attributes:
+                elem.set(key, value)
+    return etree.tostring(root, pretty_print=True, encoding='unicode')
+
+def _myers_split(a, a_lo, a_hi, b, b_lo, b_hi, max_cost, cancel_event=None):
+    """
+    Finds the middle snake of two sequences, using O(N+M) memory. Returns (split, cost): an absolute
+    split point, or None when no split was found within max_cost steps or the search was cancelled.
+    """
+    len_a = a_hi - a_lo
+    len_b = b_hi - b_lo
+    max_d = (len_a + len_b + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v2 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2[v_offset + 1] = 0
+    delta = len_a - len_b
+    # If the total number of lines is odd, the front path collides with the reverse path.
+    front = delta % 2 != 0
+    k1_start = k1_end = k2_start = k2_end = 0
+    cost = 0
+    for d in range(max_d):
+        # Like GNU diff's "too expensive" heuristic: give up on regions that share too few lines.
+        if cost > max_cost or (cancel_event is not None and cancel_event.is_set()):
+            return None, cost
+        # Walk the front path one step.
+        for k1 in range(-d + k1_start, d + 1 - k1_end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            snake_start = x1
+            while x1 < len_a and y1 < len_b and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            cost += x1 - snake_start + 1
+            v1[k1_offset] = x1
+            if x1 > len_a:
+                k1_end += 2
+            elif y1 > len_b:
+                k1_start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= len_a - v2[k2_offset]:
+                        return (a_lo + x1, b_lo + y1), cost
+        # Walk the reverse path one step.
+        for k2 in range(-d + k2_start, d + 1 - k2_end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            snake_start = x2
+            while x2 < len_a and y2 < len_b and a[a_hi - x2 - 1] == b[b_hi - y2 - 1]:
+                x2 += 1
+                y2 += 1
+            cost += x2 - snake_start + 1
+            v2[k2_offset] = x2
+            if x2 > len_a:
+                k2_end += 2
+            elif y2 > len_b:
+                k2_start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    y1 = v_offset + x1 - k1_offset
+                    if x1 >= len_a - x2:
+                        return (a_lo + x1, b_lo + y1), cost
+    return None, cost
+
+def _unique_line_anchors(a, b):
+    """Returns the longest increasing run of (a_index, b_index) pairs for lines unique to both sides."""
+    counts_a = Counter(a)
+    counts_b = Counter(b)
+    b_positions = {line: j for j, line in enumerate(b) if counts_b[line] == 1}
+    pairs = [(i, b_positions[line]) for i, line in enumerate(a) if counts_a[line] == 1 and line in b_positions]
+
+    # Patience sorting over b_index gives the longest increasing subsequence.
+    tails = []
+    tail_pairs = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pile = bisect_left(tails, j)
+        if pile == len(tails):
+            tails.append(j)
+            tail_pairs.append(index)
+        else:
+            tails[pile] = j
+            tail_pairs[pile] = index
+        previous[index] = tail_pairs[pile - 1] if pile > 0 else -1
+
+    anchors = []
+    index = tail_pairs[-1] if tail_pairs else -1
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+def diff_lines(a_lines, b_lines, cancel_event=None, max_cost=DIFF_MAX_COST):
+    """
+    Compares two lists of lines with a linear-space Myers diff.
+    Returns difflib-style opcodes: (tag, a_start, a_end, b_start, b_end), or None if cancelled.
+    Once the search has taken max_cost steps, the remaining changed regions are reported
+    as a whole delete and insert, which bounds the time taken on outputs that share few lines.
+    """
+    # Compare small integers instead of full strings.
+    line_ids = {}
+    a = [line_ids.setdefault(line, len(line_ids)) for line in a_lines]
+    b = [line_ids.setdefault(line, len(line_ids)) for line in b_lines]
+
+    raw_ops = []
+    def emit(tag, a1, a2, b1, b2):
+        if a1 != a2 or b1 != b2:
+            raw_ops.append((tag, a1, a2, b1, b2))
+
+    # Lines that occur exactly once on both sides split the problem into small independent regions.
+    segments = []
+    prev_a = prev_b = 0
+    for i, j in _unique_line_anchors(a, b):
+        segments.append((False, prev_a, i, prev_b, j))
+        segments.append((True, i, i + 1, j, j + 1))
+        prev_a, prev_b = i + 1, j + 1
+    segments.append((False, prev_a, len(a), prev_b, len(b)))
+
+    # Iterative divide and conquer; the stack keeps the emitted opcodes in document order.
+    stack = segments[::-1]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        is_equal, a1, a2, b1, b2 = stack.pop()
+        if is_equal:
+            emit('equal', a1, a2, b1, b2)
+            continue
+
+        prefix_a, prefix_b = a1, b1
+        while a1 < a2 and b1 < b2 and a[a1] == b[b1]:
+            a1 += 1
+            b1 += 1
+        emit('equal', prefix_a, a1, prefix_b, b1)
+
+        suffix_a, suffix_b = a2, b2
+        while a1 < a2 and b1 < b2 and a[a2 - 1] == b[b2 - 1]:
+            a2 -= 1
+            b2 -= 1
+
+        split = None
+        if a1 < a2 and b1 < b2 and max_cost > 0:
+            split, cost = _myers_split(a, a1, a2, b, b1, b2, max_cost, cancel_event)
+            max_cost -= cost
+
+        stack.append((True, a2, suffix_a, b2, suffix_b))
+        if split is None:
+            emit('delete', a1, a2, b1, b1)
+            emit('insert', a2, a2, b1, b2)
+        else:
+            x, y = split
+            stack.append((False, x, a2, y, b2))
+            stack.append((False, a1, x, b1, y))
+
+    # Merge runs of deletes and inserts between equal blocks into single opcodes.
+    opcodes = []
+    for tag, a1, a2, b1, b2 in raw_ops:
+        if opcodes and (opcodes[-1][0] == 'equal') == (tag == 'equal'):
+            prev = opcodes[-1]
+            a_start, b_start = prev[1], prev[3]
+            if tag != 'equal':
+                has_a = a2 > a_start
+                has_b = b2 > b_start
+                tag = 'replace' if has_a and has_b else ('delete' if has_a else 'insert')
+            opcodes[-1] = (tag, a_start, a2, b_start, b2)
+        else:
+            opcodes.append((tag, a1, a2, b1, b2))
+    return opcodes
+
+def build_diff_rows(old_text, new_text, xml_aware=False, cancel_event=None):
+    """
+    Builds side-by-side rows of (tag, old_line_no, old_line, new_line_no, new_line) for the diff view.
+    Returns None if cancel_event was set before the diff finished.
+    """
+    if xml_aware:
+        try:
+            old_text = canonicalize_xml_for_diff(old_text)
+            new_text = canonicalize_xml_for_diff(new_text)
+        except Exception:
+            pass  # Fall back to a plain line diff for non-XML outputs.
+
+    old_lines = old_text.splitlines()
+    new_lines = new_text.splitlines()
+    opcodes = diff_lines(old_lines, new_lines, cancel_event)
+    if opcodes is None:
+        return None
+    rows = []
+    for tag, a1, a2, b1, b2 in opcodes:
+        if tag == 'equal':
+            for offset in range(a2 - a1):
+                rows.append((tag, a1 + offset + 1, old_lines[a1 + offset], b1 + offset + 1, new_lines[b1 + offset]))
+            continue
+        for offset in range(max(a2 - a1, b2 - b1)):
+            i, j = a1 + offset, b1 + offset
+            rows.append((tag,
+                         i + 1 if i < a2 else None, old_lines[i] if i < a2 else None,
+                         j + 1 if j < b2 else None, new_lines[j] if j < b2 else None))
+    return rows
+
+def iter_xpaths(root):
+    """
+    Yields (xpath, line, value) for every element and attribute in a single pass over the tree.
+    The paths follow the same rules as get_detailed_xpath.
+    """
+    nsmap = {v: k for k, v in root.nsmap.items()}
+    prefixed_names = {}
+    identifying_names = {}
+
+    def prefixed(name):
+        prefixed_name = prefixed_names.get(name)
+        if prefixed_name is None:
+            qname = etree.QName(name)
+            prefix = nsmap.get(qname.namespace)
+            prefixed_name = f"{prefix}:{qname.localname}" if prefix else qname.localname
+            prefixed_names[name] = prefixed_name
+            identifying_names[name] = qname.localname in IDENTIFYING_ATTRIBUTES
+        return prefixed_name
+
+    def is_identifying(attr_key):
+        prefixed(attr_key)
+        return identifying_names[attr_key]
+
+    # Each stack entry carries the finished path of its element, so ancestors are never revisited.
+    stack = [(root, '/' + prefixed(root.tag))]
+    while stack:
+        element, xpath = stack.pop()
+        yield xpath, element.sourceline, (element.text or "").strip()
+        attributes = element.items()
+        for attr_key, attr_value in attributes:
+            yield f"{xpath}/@{prefixed_names.get(attr_key) or prefixed(attr_key)}", element.sourceline, attr_value
+
+        children = list(element.iterchildren(etree.Element))
+        if not children:
+            continue
+        tags = [prefixed_names.get(child.tag) or prefixed(child.tag) for child in children]
+        tag_counts = {}
+        for tag in tags:
+            tag_counts[tag] = tag_counts.get(tag, 0) + 1
+
+        # Identifying attribute values only need counting among siblings that share a tag.
+        child_attributes = [child.items() for child in children]
+        attr_counts = {}
+        if len(tag_counts) < len(tags):
+            for tag, items in zip(tags, child_attributes):
+                if tag_counts[tag] > 1:
+                    for attr_key, attr_value in items:
+                        if is_identifying(attr_key):
+                            key = (tag, attr_key, attr_value)
+                            attr_counts[key] = attr_counts.get(key, 0) + 1
+
+        sibling_index = {}
+        child_entries = []
+        for child, tag, items in zip(children, tags, child_attributes):
+            index = sibling_index.get(tag, 0) + 1
+            sibling_index[tag] = index
+            predicate = ""
+            for attr_key, attr_value in items:
+                if is_identifying(attr_key) and (tag_counts[tag] == 1 or attr_counts[(tag, attr_key, attr_value)] == 1):
+                    predicate = f"[@{prefixed(attr_key)}='{attr_value}']"
+                    break
+            if not predicate and tag_counts[tag] > 1:
+                predicate = f"[{index}]"
+            child_entries.append((child, f"{xpath}/{tag}{predicate}"))
+        stack.extend(reversed(child_entries))
+
+def export_xpaths(root, out_file, output_format='csv'):
+    """Streams (xpath, line, value) rows for the whole tree to out_file as CSV or JSONL. Returns the row count."""
+    count = 0
+    if output_format == 'jsonl':
+        for xpath, line, value in iter_xpaths(root):
+            out_file.write(json.dumps({'xpath': xpath, 'line': line, 'value': value}, ensure_ascii=False) + '\n')
+            count += 1
+    else:
+        writer = csv.writer(out_file)
+        writer.writerow(['xpath', 'line', 'value'])
+        for row in iter_xpaths(root):
+            writer.writerow(row)
+            count += 1
+    return count
+
+def compression_suffix(path):
+    """Returns '.gz', '.bz2', '.xz' or '.zip' when path names a compressed file, else ''."""
+    suffix = os.path.splitext(path)[1].lower()
+    return suffix if suffix in COMPRESSION_OPENERS or suffix == '.zip' else ''
+
+def zip_members(path):
+    """Returns the files in a zip archive, XML files first."""
+    with zipfile.ZipFile(path) as archive:
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    return sorted(names, key=lambda name: not name.lower().endswith('.xml'))
+
+def open_xml_input(path, member=None):
+    """
+    Opens an XML file for binary reading. .gz, .bz2 and .xz files are decompressed as they are read;
+    for a .zip archive the given member (by default the first XML file) is read.
+    """
+    suffix = compression_suffix(path)
+    if suffix == '.zip':
+        if member is None:
+            members = zip_members(path)
+            if not members:
+                raise ValueError(f"{os.path.basename(path)} contains no files.")
+            member = members[0]
+        # The member stays readable after the archive object is closed.
+        with zipfile.ZipFile(path) as archive:
+            return archive.open(member)
+    if suffix:
+        return COMPRESSION_OPENERS[suffix](path, 'rb')
+    return open(path, 'rb')
+
+@contextmanager
+def open_output_file(path, encoding=None, newline=None):
+    """
+    Opens path for writing, in text mode if an encoding is given. Output is compressed when the extension
+    is .gz, .bz2 or .xz; a .zip gets a single member named after the archive.
+    """
+    suffix = compression_suffix(path)
+    with ExitStack() as stack:
+        if suffix == '.zip':
+            member = os.path.basename(path)[:-len(suffix)]
+            if not os.path.splitext(member)[1]:
+                member += '.xml'
+            info = zipfile.ZipInfo(member, time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive = stack.enter_context(zipfile.ZipFile(path, 'w'))
+            stream = stack.enter_context(archive.open(info, 'w', force_zip64=True))
+        elif suffix:
+            stream = stack.enter_context(COMPRESSION_OPENERS[suffix](path, 'wb'))
+        else:
+            stream = stack.enter_context(open(path, 'wb'))
+        if encoding:
+            stream = stack.enter_context(TextIOWrapper(stream, encoding=encoding, newline=newline))
+        yield stream
+
+def export_xpaths_to_file(output_path, output_format=None, xml_file=None, xml_text=None):
+    """Parses the XML given by xml_file or xml_text and writes all XPaths to output_path."""
+    if output_format is None:
+        base_path = output_path[:len(output_path) - len(compression_suffix(output_path))]
+        output_format = 'jsonl' if base_path.lower().endswith('.jsonl') else 'csv'
+    parser = etree.XMLParser(huge_tree=True)
+    if xml_file is not None:
+        with open_xml_input(xml_file) as f:
+            root = etree.parse(f, parser).getroot()
+    else:
+        root = etree.fromstring(xml_text.encode('utf-8'), parser)
+    with open_output_file(output_path, encoding='utf-8', newline='') as f:
+        return export_xpaths(root, f, output_format)
+
+def get_detailed_xpath(element):
+    root = element.getroottree().getroot()
+    nsmap = {v: k for k, v in root.nsmap.items()}
+
+    components = []
+    child = element
+    while child is not None:
+        parent = child.getparent()
+
+        qname = etree.QName(child)
+        prefix = nsmap.get(qname.namespace)
+        tag_name = qname.localname
+        prefixed_tag = f"{prefix}:{tag_name}" if prefix else tag_name
+
+        current_component = prefixed_tag
+        predicate = ""
+
+        if parent is not None: # Don't try to find siblings or attributes for the root element
+            # Find siblings with the exact same prefixed tag name
+            siblings_with_same_prefixed_tag = []
+            for sib in parent.iterchildren(etree.Element): # Skip comments and processing instructions
+                sib_qname = etree.QName(sib)
+                sib_prefix = nsmap.get(sib_qname.namespace)
+                sib_prefixed_tag = f"{sib_prefix}:{sib_qname.localname}" if sib_prefix else sib_qname.localname
+                if sib_prefixed_tag == prefixed_tag:
+                    siblings_with_same_prefixed_tag.append(sib)
+
+            # Always try to find a strong identifying attribute predicate, if available and useful.
+            strong_identifying_attr_predicate = ""
+            for attr_key, attr_value in child.attrib.items():
+                attr_qname = etree.QName(attr_key)
+                if attr_qname.localname in IDENTIFYING_ATTRIBUTES:
+                    # Check if this attribute makes it unique among siblings (if multiple siblings exist)
+                    # Or if it's simply a strong identifier to make XPath more robust (even if unique by tag)
+                    is_unique_by_this_attr = True
+                    if len(siblings_with_same_prefixed_tag) > 1:
+                        for sib in siblings_with_same_prefixed_tag:
+                            if sib is not child and sib.get(attr_key) == attr_value:
+                                is_unique_by_this_attr = False
+                                break
+
+                    if is_unique_by_this_attr: # If unique or if only one sibling with this strong identifier
+                        attr_prefix = nsmap.get(attr_qname.namespace)
+                        attr_name = f"{attr_prefix}:{attr_qname.localname}" if attr_prefix else attr_qname.localname
+                        strong_identifying_attr_predicate = f"[@{attr_name}='{attr_value}']"
+                        break # Found a good identifying attribute, prioritize this one
+
+            if strong_identifying_attr_predicate:
+                predicate = strong_identifying_attr_predicate
+            elif len(siblings_with_same_prefixed_tag) > 1:
+                # If no strong identifying attribute or it's not unique by that, use index
+                idx = siblings_with_same_prefixed_tag.index(child) + 1
+                predicate = f"[{idx}]"
+
+        current_component += predicate
+        components.append(current_component)
+        child = parent
+
+    components.reverse()
+    return '/' + '/'.join(components)
+
+def find_element_at_line(root, line_number):
+    best_candidate = None
+    for elem in root.iter():
+        if hasattr(elem, 'sourceline') and elem.sourceline is not None:
+            if elem.sourceline > line_number:
+                # Once we pass the target line, the last element seen is the best candidate
+                return best_candidate
+            best_candidate = elem
+    return best_candidate
+
+def generate_xpath_at(text, line_number, col_number, line_text=None, xml_file=None):
+    """
+    Returns the XPath of the element (or attribute) at a 1-based line and 0-based column of the XML text.
+    xml_file may name the file behind an unedited text, which is then parsed instead of re-encoding the text.
+    """
+    # Use the 'recover' parser to handle potentially non-well-formed XML during editing
+    parser = etree.XMLParser(recover=True)
+    if xml_file is not None:
+        # Attribute value normalization turns literal newlines into spaces, so any newline in the result was &#10;.
+        root = etree.parse(xml_file, parser).getroot()
+        newline = "\n"
+    else:
+        text_with_placeholder = text.replace("&#10;", NEWLINE_PLACEHOLDER)
+        # Use BytesIO to handle encoding correctly
+        root = etree.parse(BytesIO(text_with_placeholder.encode('utf-8')), parser).getroot()
+        newline = NEWLINE_PLACEHOLDER
+    if root is None:
+        return ""
+
+    element = find_element_at_line(root, line_number)
+    if element is None:
+        return ""
+
+    xpath = get_detailed_xpath(element)
+
+    if line_text is None and text is None:
+        with open(xml_file, 'r', encoding='utf-8') as f:
+            line_text = next(islice(f, line_number - 1, None), "").rstrip("\n") if line_number > 0 else ""
+    elif line_text is None:
+        lines = text.splitlines()
+        line_text = lines[line_number - 1] if 0 < line_number <= len(lines) else ""
+    # Regex to find attribute name and its value
+    attr_regex = re.compile(r'([\w:-]+)\s*=\s*(["\'])(.*?)\2')
+    for match in attr_regex.finditer(line_text):
+        attr_name = match.group(1)
+        # Span for the attribute name
+        name_start, name_end = match.span(1)
+        # Span for the attribute value (inside the quotes)
+        val_start, val_end = match.span(3)
+
+        # Check if cursor is on the name OR the value
+        if (name_start <= col_number < name_end) or (val_start <= col_number < val_end):
+            xpath += f'/@{attr_name}'
+            break
+
+    return xpath.replace(newline, "&#10;")
+
+def build_element_ranges(text):
+    """
+    Returns {start_line: (end_line, depth)} for every element that spans more than one line.
+    When several elements start on the same line, the outermost one is kept.
+    Uses expat because, unlike the lxml tree, it reports the line of each end tag.
+    """
+    ranges = {}
+    open_elements = []
+    parser = xml.parsers.expat.ParserCreate('utf-8')
+
+    def start_element(name, attributes):
+        open_elements.append(parser.CurrentLineNumber)
+
+    def end_element(name):
+        start_line = open_elements.pop()
+        end_line = parser.CurrentLineNumber
+        if end_line > start_line:
+            # Elements close innermost first, so the last range stored for a line is the outermost.
+            ranges[start_line] = (end_line, len(open_elements))
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    data = text.encode('utf-8')
+    for start in range(0, len(data), PARSE_CHUNK_SIZE):
+        parser.Parse(data[start:start + PARSE_CHUNK_SIZE], False)
+    parser.Parse(b'', True)
+    return ranges
+
+class _NullParserTarget:
+    """
+    Parser target that discards all events, so the parser checks well-formedness without building a tree.
+    lxml only calls back for the methods a target defines, so defining nothing but close() keeps parsing in C.
+    """
+    def close(self):
+        return None
+
+def check_well_formed(text, cancel_event=None):
+    """
+    Parses text without recovery and without building a tree.
+    Returns None if it is well-formed (or the check was cancelled), else (line, message).
+    """
+    parser = etree.XMLParser(target=_NullParserTarget(), encoding='utf-8', huge_tree=True)
+    try:
+        for start in range(0, len(text), PARSE_CHUNK_SIZE):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            parser.feed(text[start:start + PARSE_CHUNK_SIZE].encode('utf-8'))
+        parser.close()
+    except etree.XMLSyntaxError as e:
+        return e.lineno or 1, e.msg
+    return None
+
+class TaskSignals(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+
+class BackgroundTask(QRunnable):
+    """Runs a function on the global thread pool and reports the result through Qt signals."""
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+_running_tasks = set()
+
+def run_in_background(fn, *args, on_finished=None, on_failed=None, **kwargs):
+    """Starts fn(*args, **kwargs) off the GUI thread. The callbacks are invoked on the GUI thread."""
+    task = BackgroundTask(fn, *args, **kwargs)
+    if on_finished:
+        task.signals.finished.connect(on_finished)
+    if on_failed:
+        task.signals.failed.connect(on_failed)
+    # Keep the task (and its signals) alive until the result has been delivered.
+    task.signals.finished.connect(lambda _: _running_tasks.discard(task))
+    task.signals.failed.connect(lambda _: _running_tasks.discard(task))
+    _running_tasks.add(task)
+    QThreadPool.globalInstance().start(task)
+    return task
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _uri_to_path(uri):
+    parsed = urlparse(uri)
+    if parsed.scheme != 'file':
+        return None
+    return os.path.normpath(url2pathname(parsed.path))
+
+def find_stylesheet_references(root, base_uri):
+    """Returns (modules, documents): absolute paths of xsl:include/xsl:import modules and literal document() targets."""
+    modules = []
+    for link in root.iter(f'{{{XSLT_NAMESPACE}}}include', f'{{{XSLT_NAMESPACE}}}import'):
+        href = link.get('href')
+        if href:
+            path = _uri_to_path(urljoin(link.base or base_uri, href))
+            if path:
+                modules.append(path)
+    documents = []
+    document_call = re.compile(r'document\(\s*([\'"])([^\'"]+)\1\s*\)')
+    for elem in root.iter(etree.Element):
+        for value in elem.values():
+            for match in document_call.finditer(value):
+                path = _uri_to_path(urljoin(elem.base or base_uri, match.group(2)))
+                if path:
+                    documents.append(path)
+    return modules, documents
+
+def collect_stylesheet_dependencies(stylesheet_text, base_uri):
+    """
+    Walks the xsl:include/xsl:import graph starting from the stylesheet text.
+    Returns {path: {'mtime', 'sha256', 'modules'}} for every module and document() file the stylesheet depends on.
+    """
+    dependencies = {}
+    parser = etree.XMLParser(huge_tree=True)
+    root = etree.fromstring(stylesheet_text.encode('utf-8'), parser, base_url=base_uri)
+    pending = [find_stylesheet_references(root, base_uri)]
+    while pending:
+        modules, documents = pending.pop()
+        for path in documents:
+            if path not in dependencies and os.path.isfile(path):
+                dependencies[path] = {'mtime': os.path.getmtime(path), 'sha256': file_sha256(path), 'modules': []}
+        for path in modules:
+            if path in dependencies or not os.path.isfile(path):
+                continue
+            module_uri = Path(path).as_uri()
+            module_root = etree.parse(path, parser, base_url=module_uri).getroot()
+            references = find_stylesheet_references(module_root, module_uri)
+            dependencies[path] = {'mtime': os.path.getmtime(path), 'sha256': file_sha256(path),
+                                  'modules': references[0]}
+            pending.append(references)
+    return dependencies
+
+def stylesheet_base_uri(stylesheet_path):
+    """Returns the base URI for relative references, falling back to the working directory for unsaved stylesheets."""
+    if stylesheet_path:
+        return Path(os.path.abspath(stylesheet_path)).as_uri()
+    return Path(os.path.join(os.getcwd(), "untitled.xsl")).as_uri()
+
+def compile_stylesheet(processor, stylesheet_text, stylesheet_path=None):
+    """Compiles stylesheet text with relative module and document references resolved against its file."""
+    builder = processor.new_document_builder()
+    builder.set_base_uri(stylesheet_base_uri(stylesheet_path))
+    builder.set_line_numbering(True)
+    stylesheet_node = builder.parse_xml(xml_text=stylesheet_text)
+    return processor.new_xslt30_processor().compile_stylesheet(stylesheet_node=stylesheet_node)
+
+def parse_xml_input(processor, xml_text=None, xml_file=None):
+    """
+    Parses the transformation input with Saxon. Saxon reads plain files itself; it only accepts a file name
+    or a string, so compressed files are decompressed into memory first.
+    """
+    if xml_file and compression_suffix(xml_file):
+        with TextIOWrapper(open_xml_input(xml_file), encoding='utf-8') as f:
+            xml_text = f.read()
+        xml_file = None
+    if xml_file:
+        return processor.parse_xml(xml_file_name=xml_file)
+    return processor.parse_xml(xml_text=xml_text)
+
+
+class StylesheetCache(QObject):
+    """
+    Keeps compiled stylesheets with the module graph they were compiled from.
+    An executable is reused until the stylesheet text or one of its modules on disk changes.
+    Without watch_files, changes are still detected by checking mtimes when the executable is requested.
+    """
+    def __init__(self, parent=None, watch_files=True):
+        super().__init__(parent)
+        self.processor = PySaxonProcessor(license=False)
+        self.entries = OrderedDict()
+        self.watcher = None
+        if watch_files:
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.fileChanged.connect(self._dependency_changed)
+
+    def get_executable(self, stylesheet_text, stylesheet_path=None):
+        """Returns (executable, reused)."""
+        base_uri = stylesheet_base_uri(stylesheet_path)
+        key = (hashlib.sha256(stylesheet_text.encode('utf-8')).hexdigest(), base_uri)
+        entry = self.entries.get(key)
+        if entry is not None and self._dependencies_unchanged(entry['dependencies']):
+            self.entries.move_to_end(key)
+            return entry['executable'], True
+
+        try:
+            dependencies = collect_stylesheet_dependencies(stylesheet_text, base_uri)
+        except etree.XMLSyntaxError:
+            dependencies = {}  # Let Saxon report the error with its own message.
+
+        executable = compile_stylesheet(self.processor, stylesheet_text, stylesheet_path)
+        self.entries[key] = {'executable': executable, 'dependencies': dependencies}
+        self.entries.move_to_end(key)
+        while len(self.entries) > MAX_CACHED_STYLESHEETS:
+            self.entries.popitem(last=False)
+        self._update_watched_files()
+        return executable, False
+
+    def _dependencies_unchanged(self, dependencies):
+        for path, info in dependencies.items():
+            try:
+                if os.path.getmtime(path) == info['mtime']:
+                    continue
+                # Touched but not edited: keep the executable.
+                if file_sha256(path) != info['sha256']:
+                    return False
+                info['mtime'] = os.path.getmtime(path)
+            except OSError:
+                return False
+        return True
+
+    def _dependency_changed(self, path):
+        path = os.path.normpath(path)
+        for key in [key for key, entry in self.entries.items() if path in entry['dependencies']]:
+            if not self._dependencies_unchanged(self.entries[key]['dependencies']):
+                del self.entries[key]
+        self._update_watched_files()
+
+    def _update_watched_files(self):
+        if self.watcher is None:
+            return
+        wanted = {path for entry in self.entries.values() for path in entry['dependencies'] if os.path.isfile(path)}
+        watched = set(self.watcher.files())
+        if watched - wanted:
+            self.watcher.removePaths(list(watched - wanted))
+        # Editors that save by replacing the file drop the watch, so missing paths are re-added.
+        if wanted - watched:
+            self.watcher.addPaths(list(wanted - watched))
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted, non-empty list, e.g. fraction=0.95 for p95."""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def summarize_timings(seconds, input_bytes=0):
+    """Returns min/median/p95/max in milliseconds and the throughput of a list of run times in seconds."""
+    ordered = sorted(seconds)
+    total = sum(ordered)
+    summary = {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'runs_per_second': round(len(ordered) / total, 3) if total else 0.0,
+    }
+    if input_bytes and total:
+        summary['input_mb_per_second'] = round(input_bytes * len(ordered) / total / (1024 * 1024), 3)
+    return summary
+
+def benchmark_transform(stylesheet_text, xml_text=None, xml_file=None, stylesheet_path=None,
+                        runs=BENCHMARK_RUNS, warmup=BENCHMARK_WARMUP_RUNS, processor=None):
+    """
+    Compiles the stylesheet once, then parses and transforms the input warmup + runs times.
+    Only the runs after the warm-up are measured; the compile time is reported separately.
+    """
+    if runs < 1:
+        raise ValueError("At least one measured run is required.")
+    processor = processor or PySaxonProcessor(license=False)
+    started = time.perf_counter()
+    executable = compile_stylesheet(processor, stylesheet_text, stylesheet_path)
+    compile_seconds = time.perf_counter() - started
+
+    timings = []
+    for run in range(warmup + runs):
+        started = time.perf_counter()
+        document = parse_xml_input(processor, xml_text, xml_file)
+        if not document:
+            raise ValueError("Error parsing XML.")
+        executable.transform_to_string(xdm_node=document)
+        if run >= warmup:
+            timings.append(time.perf_counter() - started)
+
+    if xml_file:
+        # A compressed input is measured by its decompressed content, so it compares with a plain copy.
+        digest = hashlib.sha256()
+        input_bytes = 0
+        with open_xml_input(xml_file) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+                input_bytes += len(chunk)
+        input_sha256 = digest.hexdigest()
+    else:
+        input_data = xml_text.encode('utf-8')
+        input_bytes, input_sha256 = len(input_data), hashlib.sha256(input_data).hexdigest()
+    result = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'stylesheet_sha256': hashlib.sha256(stylesheet_text.encode('utf-8')).hexdigest(),
+        'stylesheet_path': os.path.abspath(stylesheet_path) if stylesheet_path else None,
+        'input_sha256': input_sha256,
+        'input_bytes': input_bytes,
+        'warmup': warmup,
+        'compile_ms': round(compile_seconds * 1000, 3),
+    }
+    result.update(summarize_timings(timings, input_bytes))
+    return result
+
+def load_benchmark_history(history_file=BENCHMARK_HISTORY_FILE):
+    entries = []
+    try:
+        with open(history_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # A line cut short by an interrupted write.
+    except FileNotFoundError:
+        pass
+    return entries
+
+def find_previous_benchmark(result, history):
+    """
+    Returns the latest earlier result for the same stylesheet on the same input. A saved stylesheet
+    is matched by path as well as by hash, so that results before and after an edit can be compared.
+    """
+    for entry in reversed(history):
+        if entry.get('input_sha256') != result['input_sha256']:
+            continue
+        if entry.get('stylesheet_sha256') == result['stylesheet_sha256']:
+            return entry
+        if result['stylesheet_path'] and entry.get('stylesheet_path') == result['stylesheet_path']:
+            return entry
+    return None
+
+def record_benchmark(result, history_file=BENCHMARK_HISTORY_FILE):
+    """Appends a result to the history file and returns the previous comparable result, if any."""
+    previous = find_previous_benchmark(result, load_benchmark_history(history_file))
+    with open(history_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result) + '\n')
+    return previous
+
+def format_benchmark_report(result, previous=None):
+    throughput = f"{result['runs_per_second']} runs/s"
+    if 'input_mb_per_second' in result:
+        throughput += f", {result['input_mb_per_second']} MB/s of input"
+    lines = [
+        f"{result['runs']} runs after {result['warmup']} warm-up runs (compile: {result['compile_ms']} ms)",
+        f"min {result['min_ms']} ms, median {result['median_ms']} ms, "
+        f"p95 {result['p95_ms']} ms, max {result['max_ms']} ms",
+        f"Throughput: {throughput}",
+    ]
+    if previous is not None:
+        if previous['stylesheet_sha256'] == result['stylesheet_sha256']:
+            version = "same stylesheet"
+        else:
+            version = "stylesheet edited since"
+        change = ""
+        if previous['median_ms']:
+            change = f" ({(result['median_ms'] - previous['median_ms']) / previous['median_ms'] * 100:+.1f}%)"
+        lines.append(f"Previous run {previous['timestamp']} ({version}): median {previous['median_ms']} ms{change}")
+    return "\n".join(lines)
+
+def collect_schema_files(schema_paths):
+    """Returns {path: mtime} for the given schemas and every xs:include/xs:import/xs:redefine/xs:override they reach."""
+    files = {}
+    pending = [os.path.normpath(os.path.abspath(path)) for path in schema_paths]
+    links = [f'{{{XSD_NAMESPACE}}}{name}' for name in ('include', 'import', 'redefine', 'override')]
+    while pending:
+        path = pending.pop()
+        if path in files or not os.path.isfile(path):
+            continue
+        files[path] = os.path.getmtime(path)
+        module_uri = Path(path).as_uri()
+        root = etree.parse(path, etree.XMLParser(huge_tree=True), base_url=module_uri).getroot()
+        for link in root.iter(*links):
+            location = link.get('schemaLocation')
+            if location:
+                linked_path = _uri_to_path(urljoin(module_uri, location))
+                if linked_path:
+                    pending.append(linked_path)
+    return files
+
+def compile_schema(schema_paths):
+    """Compiles one or more XSD files into a single lxml XMLSchema."""
+    if len(schema_paths) == 1:
+        return etree.XMLSchema(etree.parse(schema_paths[0], etree.XMLParser(huge_tree=True)))
+    # Several schemas (usually one per namespace) are combined through an in-memory driver schema.
+    driver = etree.Element(f'{{{XSD_NAMESPACE}}}schema')
+    for path in schema_paths:
+        namespace = etree.parse(path).getroot().get('targetNamespace')
+        if namespace:
+            etree.SubElement(driver, f'{{{XSD_NAMESPACE}}}import', namespace=namespace,
+                             schemaLocation=Path(os.path.abspath(path)).as_uri())
+        else:
+            etree.SubElement(driver, f'{{{XSD_NAMESPACE}}}include', schemaLocation=Path(os.path.abspath(path)).as_uri())
+    return etree.XMLSchema(driver)
+
+
+class SchemaCache:
+    """
+    Compiled XSDs keyed by the set of schema files. An entry stays valid while the mtimes of all
+    the files it was compiled from (including includes and imports) are unchanged.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get_schema(self, schema_paths):
+        key = frozenset(os.path.normpath(os.path.abspath(path)) for path in schema_paths)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and all(os.path.isfile(path) and os.path.getmtime(path) == mtime
+                                         for path, mtime in entry['files'].items()):
+                return entry
+            files = collect_schema_files(sorted(key))
+            entry = {'schema': compile_schema(sorted(key)), 'files': files, 'lock': threading.Lock()}
+            self.entries[key] = entry
+            return entry
+
+    def validate(self, schema_paths, xml_text, xml_file=None):
+        """
+        Validates xml_text (or the XML file xml_file) and returns a list of (line, message);
+        an empty list means the document is valid.
+        """
+        entry = self.get_schema(schema_paths)
+        parser = etree.XMLParser(huge_tree=True)
+        try:
+            if xml_file is not None:
+                document = etree.parse(xml_file, parser)
+            else:
+                document = etree.fromstring(xml_text.encode('utf-8'), parser).getroottree()
+        except etree.XMLSyntaxError as e:
+            return [(e.lineno or 1, f"Invalid XML - {e.msg}")]
+        # An XMLSchema instance must not validate two documents at the same time.
+        with entry['lock']:
+            schema = entry['schema']
+            if schema.validate(document):
+                return []
+            return [(error.line, error.message) for error in list(schema.error_log)[:MAX_DIAGNOSTICS]]
+
+
+class _JobObjectBasicLimitInformation(ctypes.Structure):
+    _fields_ = [('PerProcessUserTimeLimit', ctypes.c_int64), ('PerJobUserTimeLimit', ctypes.c_int64),
+                ('LimitFlags', ctypes.c_uint32), ('MinimumWorkingSetSize', ctypes.c_size_t),
+                ('MaximumWorkingSetSize', ctypes.c_size_t), ('ActiveProcessLimit', ctypes.c_uint32),
+                ('Affinity', ctypes.c_size_t), ('PriorityClass', ctypes.c_uint32), ('SchedulingClass', ctypes.c_uint32)]
+
+class _JobObjectExtendedLimitInformation(ctypes.Structure):
+    _fields_ = [('BasicLimitInformation', _JobObjectBasicLimitInformation), ('IoInfo', ctypes.c_uint64 * 6),
+                ('ProcessMemoryLimit', ctypes.c_size_t), ('JobMemoryLimit', ctypes.c_size_t),
+                ('PeakProcessMemoryUsed', ctypes.c_size_t), ('PeakJobMemoryUsed', ctypes.c_size_t)]
+
+class WorkerJobObject:
+    """
+    Memory and CPU-time limits for the current process on Windows, where rlimits do not exist:
+    the process puts itself into a job object with JOB_OBJECT_LIMIT_PROCESS_MEMORY and
+    JOB_OBJECT_LIMIT_PROCESS_TIME, and Windows terminates it once it uses up its user-mode time.
+    """
+    EXTENDED_LIMIT_INFORMATION = 9
+    LIMIT_PROCESS_TIME = 0x2
+    LIMIT_PROCESS_MEMORY = 0x100
+
+    def __init__(self, memory_limit_mb):
+        self.kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self.kernel32.CreateJobObjectW.restype = ctypes.c_void_p
+        self.kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+        self.kernel32.SetInformationJobObject.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_void_p,
+                                                          ctypes.c_uint32]
+        self.kernel32.AssignProcessToJobObject.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        self.job = self.kernel32.CreateJobObjectW(None, None)
+        if not self.job:
+            raise ctypes.WinError(ctypes.get_last_error())
+        self.limits = _JobObjectExtendedLimitInformation()
+        self.limits.BasicLimitInformation.LimitFlags = self.LIMIT_PROCESS_MEMORY
+        self.limits.ProcessMemoryLimit = memory_limit_mb * 1024 * 1024
+        self._apply()
+        if not self.kernel32.AssignProcessToJobObject(self.job, self.kernel32.GetCurrentProcess()):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def _apply(self):
+        if not self.kernel32.SetInformationJobObject(self.job, self.EXTENDED_LIMIT_INFORMATION,
+                                                     ctypes.byref(self.limits), ctypes.sizeof(self.limits)):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def set_cpu_time_limit(self, seconds):
+        """Like RLIMIT_CPU, the limit counts the whole process, so the budget is added to the time used so far."""
+        basic = self.limits.BasicLimitInformation
+        basic.LimitFlags |= self.LIMIT_PROCESS_TIME
+        basic.PerProcessUserTimeLimit = int((os.times().user + seconds) * 10_000_000)  # In 100 ns units.
+        self._apply()
+
+
+def _transform_worker_main(conn, memory_limit_mb, cpu_time_limit):
+    """Entry point of an isolated transform worker. Keeps its own Saxon processor and compiled stylesheets."""
+    job_object = None
+    if resource is not None:
+        memory_limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    elif os.name == 'nt':
+        job_object = WorkerJobObject(memory_limit_mb)
+    stylesheet_cache = StylesheetCache(watch_files=False)
+    conn.send(('ready', os.getpid()))
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        if resource is not None:
+            # RLIMIT_CPU counts the whole process, so the budget is added to the time used so far.
+            used = resource.getrusage(resource.RUSAGE_SELF)
+            soft_limit = int(used.ru_utime + used.ru_stime) + cpu_time_limit
+            resource.setrlimit(resource.RLIMIT_CPU, (soft_limit, resource.RLIM_INFINITY))
+        elif job_object is not None:
+            job_object.set_cpu_time_limit(cpu_time_limit)
+        try:
+            executable, reused = stylesheet_cache.get_executable(job['stylesheet_text'], job.get('stylesheet_path'))
+            document = parse_xml_input(stylesheet_cache.processor, job.get('xml_text'), job.get('xml_file'))
+            if not document:
+                conn.send(('error', "Error parsing XML."))
+                continue
+            output = executable.transform_to_string(xdm_node=document) or ""
+        except Exception as e:
+            conn.send(('error', str(e)))
+            continue
+        # The result is streamed back in chunks so a large output never needs a second full-size pickle.
+        for start in range(0, len(output), TRANSFORM_RESULT_CHUNK_SIZE):
+            conn.send(('chunk', output[start:start + TRANSFORM_RESULT_CHUNK_SIZE]))
+        conn.send(('done', reused))
+
+
+class TransformWorkerError(Exception):
+    pass
+
+
+class TransformWorkerPool:
+    """
+    A pool of pre-started worker processes that run transformations outside the GUI process.
+    A worker that crashes, exceeds its limits or times out is killed and replaced.
+    Memory and CPU-time limits are enforced with rlimits, or with a job object on Windows;
+    a wall-clock timeout additionally catches workers that hang.
+    """
+    def __init__(self, size=TRANSFORM_WORKERS, memory_limit_mb=TRANSFORM_MEMORY_LIMIT_MB,
+                 cpu_time_limit=TRANSFORM_CPU_TIME_LIMIT):
+        self.size = size
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_time_limit = cpu_time_limit
+        # A fresh interpreter per worker avoids forking a process that already runs Qt and Saxon threads.
+        self.context = multiprocessing.get_context('spawn')
+        self.idle_workers = queue.Queue()
+        self.closed = False
+        for _ in range(size):
+            self.idle_workers.put(self._start_worker())
+
+    def _start_worker(self):
+        parent_conn, child_conn = self.context.Pipe()
+        process = self.context.Process(target=_transform_worker_main, daemon=True,
+                                       args=(child_conn, self.memory_limit_mb, self.cpu_time_limit))
+        process.start()
+        child_conn.close()
+        return {'process': process, 'conn': parent_conn, 'ready': False}
+
+    def _kill_worker(self, worker):
+        worker['process'].kill()
+        worker['process'].join()
+        worker['conn'].close()
+
+    def _receive(self, worker, deadline):
+        if not worker['conn'].poll(max(0, deadline - time.monotonic())):
+            raise TimeoutError
+        return worker['conn'].recv()
+
+    def _describe_exit(self, worker, timed_out):
+        if timed_out:
+            return "Transformation timed out; the worker process was stopped."
+        exit_code = worker['process'].exitcode
+        if hasattr(signal, 'SIGXCPU') and exit_code == -signal.SIGXCPU:
+            return f"Transformation exceeded the CPU time limit of {self.cpu_time_limit} seconds."
+        return f"The transform worker process stopped unexpectedly (exit code {exit_code})."
+
+    def transform(self, stylesheet_text, xml_text=None, xml_file=None, stylesheet_path=None):
+        """Runs one transformation in a worker and returns (output, reused). Blocks while all workers are busy."""
+        if self.closed:
+            raise TransformWorkerError("The transform worker pool has been shut down.")
+        worker = self.idle_workers.get()
+        try:
+            if not worker['ready']:
+                self._receive(worker, time.monotonic() + TRANSFORM_WORKER_STARTUP_TIMEOUT)
+                worker['ready'] = True
+            worker['conn'].send({'stylesheet_text': stylesheet_text, 'stylesheet_path': stylesheet_path,
+                                 'xml_text': xml_text, 'xml_file': xml_file})
+            # Wall-clock limit: generous compared to the CPU limit, but it also catches a hung worker.
+            deadline = time.monotonic() + 2 * self.cpu_time_limit
+            chunks = []
+            while True:
+                kind, payload = self._receive(worker, deadline)
+                if kind == 'chunk':
+                    chunks.append(payload)
+                elif kind == 'done':
+                    return "".join(chunks), payload
+                else:
+                    raise TransformWorkerError(payload)
+        except (TimeoutError, EOFError, OSError) as e:
+            self._kill_worker(worker)
+            message = self._describe_exit(worker, isinstance(e, TimeoutError))
+            worker = self._start_worker()
+            raise TransformWorkerError(message) from None
+        finally:
+            self.idle_workers.put(worker)
+
+    def shutdown(self):
+        self.closed = True
+        while True:
+            try:
+                worker = self.idle_workers.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker['conn'].send(None)
+            except OSError:
+                pass
+            worker['process'].join(1)
+            if worker['process'].is_alive():
+                self._kill_worker(worker)
+
+
+def _record_matcher(split_on):
+    """
+    Returns a predicate for the record elements named by split_on: a name ('record', 'ns:record'
+    or '{uri}record'), '//name', or an absolute path of names such as '/feed/records/record'.
+    """
+    def name_matches(element, name):
+        if name.startswith('{'):
+            return element.tag == name
+        prefix, _, local_name = name.rpartition(':')
+        return etree.QName(element).localname == local_name and (not prefix or element.prefix == prefix)
+
+    if split_on.startswith('//'):
+        split_on = split_on[2:]
+    if not split_on.startswith('/'):
+        return lambda element: name_matches(element, split_on)
+
+    steps = split_on.strip('/').split('/')
+    def path_matches(element):
+        for name in reversed(steps):
+            if element is None or not name_matches(element, name):
+                return False
+            element = element.getparent()
+        return element is None
+    return path_matches
+
+def _wrapper_tags(ancestors):
+    """Returns the start tags and end tags that re-create a chain of open elements, outermost first."""
+    top = shell = None
+    for element in ancestors:
+        if shell is None:
+            top = shell = etree.Element(element.tag, dict(element.attrib), nsmap=element.nsmap)
+        else:
+            shell = etree.SubElement(shell, element.tag, dict(element.attrib), nsmap=element.nsmap)
+    shell.text = ''
+    # '<' is always escaped in attribute values, so the first '</' is the innermost end tag.
+    open_tags, _, close_tags = etree.tostring(top, encoding='unicode').partition('</')
+    return open_tags, '</' + close_tags
+
+def iter_record_chunks(xml_source, split_on, chunk_size=PARTITION_CHUNK_RECORDS):
+    """
+    Streams xml_source with iterparse and yields (document, record_count) for every chunk_size records.
+    Each document wraps its records in copies of all their ancestors, from the root down, so paths such as
+    feed/records/record still select them; records under differing ancestor start tags go to different chunks.
+    Elements are released as soon as they have been read, so the full tree is never built.
+    Content outside the records is dropped.
+    """
+    if isinstance(xml_source, str):
+        with open_xml_input(xml_source) as f:
+            yield from iter_record_chunks(f, split_on, chunk_size)
+        return
+    matches = _record_matcher(split_on)
+    open_elements = []
+    ancestors = None  # The open elements around the records of the current chunk.
+    open_tags = close_tags = None
+    record = None  # The outermost record being read; nested matches belong to it.
+    records = []
+    for event, element in etree.iterparse(xml_source, events=('start', 'end'), huge_tree=True):
+        if event == 'start':
+            if record is None and open_elements and matches(element):
+                if ancestors is None or len(ancestors) != len(open_elements) or \
+                        any(a is not b for a, b in zip(ancestors, open_elements)):
+                    ancestors = list(open_elements)
+                    tags = _wrapper_tags(ancestors)
+                    # Records under identical start tags (e.g. one record per <group>) still share a chunk.
+                    if tags[0] != open_tags:
+                        if records:
+                            yield open_tags + "".join(records) + close_tags, len(records)
+                            records = []
+                        open_tags, close_tags = tags
+                record = element
+            open_elements.append(element)
+            continue
+
+        open_elements.pop()
+        if element is record:
+            records.append(etree.tostring(element, encoding='unicode', with_tail=False))
+            record = None
+            if len(records) >= chunk_size:
+                yield open_tags + "".join(records) + close_tags, len(records)
+                records = []
+        elif record is not None:
+            continue
+        element.clear()
+        parent = element.getparent()
+        if parent is not None:
+            while element.getprevious() is not None:
+                del parent[0]
+
+    if records:
+        yield open_tags + "".join(records) + close_tags, len(records)
+
+def partitioned_transform(pool, stylesheet_text, xml_source, output_file, split_on,
+                          chunk_size=PARTITION_CHUNK_RECORDS, wrapper=None, stylesheet_path=None):
+    """
+    Transforms the records of xml_source chunk by chunk on the worker pool and merges the outputs
+    in input order under one root element: wrapper if given, otherwise a copy of the root element of
+    the first chunk's output. Every chunk output must be XML; its root is dropped and its content merged.
+    Returns (record_count, chunk_count).
+    """
+    chunks = iter_record_chunks(xml_source, split_on, chunk_size)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        raise ValueError(f"No '{split_on}' records found below the root element.")
+    parser = etree.XMLParser(huge_tree=True)
+    record_count = chunk_count = 0
+    in_flight = deque()
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor, ExitStack() as stack:
+        if isinstance(output_file, str):
+            output_file = stack.enter_context(open_output_file(output_file))
+        xf = stack.enter_context(etree.xmlfile(output_file, encoding='utf-8'))
+        xf.write_declaration()
+        merged_root_open = False
+
+        def merge(output):
+            nonlocal merged_root_open
+            if not output.strip():
+                return
+            try:
+                root = etree.fromstring(output.encode('utf-8'), parser)
+            except etree.XMLSyntaxError as e:
+                raise ValueError(f"Partitioned transformations must produce XML: {e}") from None
+            if not merged_root_open:
+                if wrapper:
+                    stack.enter_context(xf.element(wrapper))
+                else:
+                    stack.enter_context(xf.element(root.tag, dict(root.attrib), nsmap=root.nsmap))
+                merged_root_open = True
+            if root.text:
+                xf.write(root.text)
+            for child in root:
+                xf.write(child)
+
+        try:
+            for chunk, count in chain([first_chunk], chunks):
+                in_flight.append(executor.submit(pool.transform, stylesheet_text, xml_text=chunk,
+                                                 stylesheet_path=stylesheet_path))
+                record_count += count
+                chunk_count += 1
+                # Reading stays at most two chunks per worker ahead, which bounds memory on any input size.
+                while len(in_flight) >= 2 * pool.size:
+                    merge(in_flight.popleft().result()[0])
+            while in_flight:
+                merge(in_flight.popleft().result()[0])
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            raise
+    return record_count, chunk_count
+
+
 class SearchReplaceWidget(QWidget):
     def __init__(self, editor):
         super().__init__(editor)
@@ -287,17 +1678,55 @@ class LineNumberArea(QWidget):
     def paintEvent(self, event):
         self.codeEditor.lineNumberAreaPaintEvent(event)
 
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            message = self.codeEditor.diagnostic_at_y(event.pos().y())
+            if message:
+                QToolTip.showText(event.globalPos(), message, self)
+            else:
+                QToolTip.hideText()
+                event.ignore()
+            return True
+        return super().event(event)
+
+class FoldArea(QWidget):
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.codeEditor = editor
+        self.setCursor(Qt.PointingHandCursor)
+
+    def sizeHint(self):
+        return QSize(self.codeEditor.foldAreaWidth(), 0)
+
+    def paintEvent(self, event):
+        self.codeEditor.foldAreaPaintEvent(event)
+
+    def mousePressEvent(self, event):
+        self.codeEditor.toggle_fold_at_y(event.position().y())
+
 class CodeEditor(QPlainTextEdit):
     xpath_changed = Signal(str)
+    definition_requested = Signal()
+    usages_requested = Signal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.lineNumberArea = LineNumberArea(self)
+        self.foldArea = FoldArea(self)
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
         self.updateRequest.connect(self.updateLineNumberArea)
         self.cursorPositionChanged.connect(self.highlightCurrentLine)
         
         self.search_widget = SearchReplaceWidget(self)
+        # Set for the XSLT editor; enables Go to Definition and Find Usages.
+        self.symbol_index = None
+        # The file the text was loaded from, kept while the text is unedited, so that parsers
+        # can read the file in chunks instead of a fresh encoding of the whole text.
+        self.source_file = None
+        self.source_stat = None
+        self.document().contentsChange.connect(self._clear_source_file_on_edit)
+        # Line markers by source, e.g. {'schema': {line_number: message}}
+        self.diagnostics = {}
         
         self.xpath_update_timer = QTimer(self)
         self.xpath_update_timer.setInterval(500)
@@ -305,6 +1734,28 @@ class CodeEditor(QPlainTextEdit):
         self.xpath_update_timer.timeout.connect(self._update_xpath)
         
         self.cursorPositionChanged.connect(self.xpath_update_timer.start)
+
+        # Foldable elements as {start_line: (end_line, depth)} and the start lines currently folded.
+        self.fold_ranges = {}
+        self.folded_lines = set()
+        self.fold_index_generation = 0
+        self.fold_index_timer = QTimer(self)
+        self.fold_index_timer.setInterval(FOLD_INDEX_DELAY_MS)
+        self.fold_index_timer.setSingleShot(True)
+        self.fold_index_timer.timeout.connect(self.rebuild_fold_index)
+        self._last_block_count = 1
+        self.document().contentsChange.connect(self._shift_fold_index)
+        self.textChanged.connect(self.fold_index_timer.start)
+
+        # Well-formedness checks run once edits settle; a newer edit cancels the check in flight.
+        self.lint_enabled = False
+        self.lint_generation = 0
+        self.lint_cancel_event = None
+        self.lint_timer = QTimer(self)
+        self.lint_timer.setInterval(LINT_DELAY_MS)
+        self.lint_timer.setSingleShot(True)
+        self.lint_timer.timeout.connect(self.run_lint)
+        self.textChanged.connect(self._schedule_lint)
         
         self.updateLineNumberAreaWidth(0)
         
@@ -379,116 +1830,58 @@ class CodeEditor(QPlainTextEdit):
         self.setExtraSelections(extra_selections)
 
     def get_detailed_xpath(self, element):
-        root = element.getroottree().getroot()
-        nsmap = {v: k for k, v in root.nsmap.items()}
+        return get_detailed_xpath(element)
 
-        components = []
-        child = element
-        while child is not None:
-            parent = child.getparent()
-
-            qname = etree.QName(child)
-            prefix = nsmap.get(qname.namespace)
-            tag_name = qname.localname
-            prefixed_tag = f"{prefix}:{tag_name}" if prefix else tag_name
+    def find_element_at_line(self, root, line_number):
+        return find_element_at_line(root, line_number)
 
-            current_component = prefixed_tag
-            predicate = ""
+    def set_source_file(self, path):
+        """Remembers the file the current text was loaded from or saved to."""
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            print(f"Could not read {path}: {e}")
+            self.clear_source_file()
+            return
+        self.source_file = path
+        self.source_stat = (stat.st_size, stat.st_mtime_ns)
 
-            if parent is not None: # Don't try to find siblings or attributes for the root element
-                # Find siblings with the exact same prefixed tag name
-                siblings_with_same_prefixed_tag = []
-                for sib in parent:
-                    sib_qname = etree.QName(sib)
-                    sib_prefix = nsmap.get(sib_qname.namespace)
-                    sib_prefixed_tag = f"{sib_prefix}:{sib_qname.localname}" if sib_prefix else sib_qname.localname
-                    if sib_prefixed_tag == prefixed_tag:
-                        siblings_with_same_prefixed_tag.append(sib)
-
-                # Always try to find a strong identifying attribute predicate, if available and useful.
-                identifying_attrs = ['id', 'ID', 'type', 'name', 'key']
-                strong_identifying_attr_predicate = ""
-                for attr_key, attr_value in child.attrib.items():
-                    attr_qname = etree.QName(attr_key)
-                    if attr_qname.localname in identifying_attrs:
-                        # Check if this attribute makes it unique among siblings (if multiple siblings exist)
-                        # Or if it's simply a strong identifier to make XPath more robust (even if unique by tag)
-                        is_unique_by_this_attr = True
-                        if len(siblings_with_same_prefixed_tag) > 1:
-                            for sib in siblings_with_same_prefixed_tag:
-                                if sib is not child and sib.get(attr_key) == attr_value:
-                                    is_unique_by_this_attr = False
-                                    break
-                        
-                        if is_unique_by_this_attr: # If unique or if only one sibling with this strong identifier
-                            attr_prefix = nsmap.get(attr_qname.namespace)
-                            attr_name = f"{attr_prefix}:{attr_qname.localname}" if attr_prefix else attr_qname.localname
-                            strong_identifying_attr_predicate = f"[@{attr_name}='{attr_value}']"
-                            break # Found a good identifying attribute, prioritize this one
-
-                if strong_identifying_attr_predicate:
-                    predicate = strong_identifying_attr_predicate
-                elif len(siblings_with_same_prefixed_tag) > 1:
-                    # If no strong identifying attribute or it's not unique by that, use index
-                    idx = siblings_with_same_prefixed_tag.index(child) + 1
-                    predicate = f"[{idx}]"
-            
-            current_component += predicate
-            components.append(current_component)
-            child = parent
+    def clear_source_file(self):
+        self.source_file = self.source_stat = None
 
-        components.reverse()
-        return '/' + '/'.join(components)
+    def _clear_source_file_on_edit(self, position, chars_removed, chars_added):
+        if chars_removed or chars_added:
+            self.clear_source_file()
 
-    def find_element_at_line(self, root, line_number):
-        best_candidate = None
-        for elem in root.iter():
-            if hasattr(elem, 'sourceline') and elem.sourceline is not None:
-                if elem.sourceline > line_number:
-                    # Once we pass the target line, the last element seen is the best candidate
-                    return best_candidate
-                best_candidate = elem
-        return best_candidate
+    def _source_unchanged(self):
+        if self.source_file is None:
+            return False
+        try:
+            stat = os.stat(self.source_file)
+            unchanged = (stat.st_size, stat.st_mtime_ns) == self.source_stat
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            # Changed on disk: from now on the editor text is the only copy that matches what is shown.
+            self.clear_source_file()
+        return unchanged
+
+    def source_path(self):
+        """Returns the file the text was loaded from while both are still identical, else None."""
+        return self.source_file if self._source_unchanged() else None
 
     def _generate_xpath_at_cursor(self):
         try:
-            text = self.toPlainText()
-            if not text.strip():
-                return ""
-
-            text_with_placeholder = text.replace("&#10;", NEWLINE_PLACEHOLDER)
-
-            # Use the 'recover' parser to handle potentially non-well-formed XML during editing
-            parser = etree.XMLParser(recover=True)
-            # Use BytesIO to handle encoding correctly
-            root = etree.parse(BytesIO(text_with_placeholder.encode('utf-8')), parser).getroot()
-
             cursor = self.textCursor()
-            line_number = cursor.blockNumber() + 1
-            col_number = cursor.positionInBlock()
+            xml_file = self.source_path()
+            if xml_file is not None:
+                return generate_xpath_at(None, cursor.blockNumber() + 1, cursor.positionInBlock(),
+                                         cursor.block().text(), xml_file=xml_file)
 
-            element = self.find_element_at_line(root, line_number)
-            if element is None:
+            text = self.toPlainText()
+            if not text.strip():
                 return ""
-
-            xpath = self.get_detailed_xpath(element)
-
-            cursor_line_text = cursor.block().text()
-            # Regex to find attribute name and its value
-            attr_regex = re.compile(r'([\w:-]+)\s*=\s*(["\'])(.*?)\2')
-            for match in attr_regex.finditer(cursor_line_text):
-                attr_name = match.group(1)
-                # Span for the attribute name
-                name_start, name_end = match.span(1)
-                # Span for the attribute value (inside the quotes)
-                val_start, val_end = match.span(3)
-
-                # Check if cursor is on the name OR the value
-                if (name_start <= col_number < name_end) or (val_start <= col_number < val_end):
-                    xpath += f'/@{attr_name}'
-                    break
-            
-            return xpath.replace(NEWLINE_PLACEHOLDER, "&#10;")
+            return generate_xpath_at(text, cursor.blockNumber() + 1, cursor.positionInBlock(), cursor.block().text())
 
         except etree.XMLSyntaxError:
             # Re-raise to be caught by the calling function
@@ -514,17 +1907,37 @@ class CodeEditor(QPlainTextEdit):
         while max_num >= 10:
             max_num //= 10
             digits += 1
-        space = 3 + self.fontMetrics().horizontalAdvance('9') * digits
+        space = 3 + DIAGNOSTIC_MARKER_WIDTH + self.fontMetrics().horizontalAdvance('9') * digits
         return space
 
+    def set_diagnostics(self, source, markers):
+        """Replaces the gutter markers of one source with {line_number: message}."""
+        if not markers and not self.diagnostics.get(source):
+            return
+        self.diagnostics[source] = markers
+        self.lineNumberArea.update()
+
+    def diagnostic_at_line(self, line_number):
+        messages = [markers[line_number] for markers in self.diagnostics.values() if line_number in markers]
+        return "\n".join(messages)
+
+    def diagnostic_at_y(self, y):
+        line_number = self.cursorForPosition(QPoint(0, y)).blockNumber() + 1
+        return self.diagnostic_at_line(line_number)
+
+    def foldAreaWidth(self):
+        return self.fontMetrics().height()
+
     def updateLineNumberAreaWidth(self, _):
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        self.setViewportMargins(self.lineNumberAreaWidth() + self.foldAreaWidth(), 0, 0, 0)
 
     def updateLineNumberArea(self, rect, dy):
         if dy:
             self.lineNumberArea.scroll(0, dy)
+            self.foldArea.scroll(0, dy)
         else:
             self.lineNumberArea.update(0, rect.y(), self.lineNumberArea.width(), rect.height())
+            self.foldArea.update(0, rect.y(), self.foldArea.width(), rect.height())
         if rect.contains(self.viewport().rect()):
             self.updateLineNumberAreaWidth(0)
 
@@ -532,8 +1945,188 @@ class CodeEditor(QPlainTextEdit):
         super().resizeEvent(event)
         cr = self.contentsRect()
         self.lineNumberArea.setGeometry(QRect(cr.left(), cr.top(), self.lineNumberAreaWidth(), cr.height()))
+        self.foldArea.setGeometry(QRect(cr.left() + self.lineNumberAreaWidth(), cr.top(),
+                                        self.foldAreaWidth(), cr.height()))
         self.search_widget.move(self.viewport().width() - self.search_widget.width() - 10, 10)
 
+    def _visible_blocks(self, rect):
+        """Yields (block, top, bottom) for the visible blocks in rect, jumping over folded regions."""
+        block = self.firstVisibleBlock()
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        while block.isValid() and top <= rect.bottom():
+            bottom = top + self.blockBoundingRect(block).height()
+            if block.isVisible() and bottom >= rect.top():
+                yield block, top, bottom
+            line_number = block.blockNumber() + 1
+            if line_number in self.folded_lines:
+                block = self.document().findBlockByNumber(self.fold_ranges[line_number][0])
+            else:
+                block = block.next()
+            top = bottom
+
+    def foldAreaPaintEvent(self, event):
+        painter = QPainter(self.foldArea)
+        if darkdetect.theme() == "Dark":
+            painter.fillRect(event.rect(), QColor("#2a2a2a"))
+            pen_color = Qt.lightGray
+        else:
+            painter.fillRect(event.rect(), QColor("#F0F0F0"))
+            pen_color = Qt.black
+        painter.setPen(pen_color)
+
+        size = self.foldAreaWidth()
+        box = max(6, size // 2)
+        for block, top, bottom in self._visible_blocks(event.rect()):
+            line_number = block.blockNumber() + 1
+            if line_number not in self.fold_ranges:
+                continue
+            left = (size - box) // 2
+            box_top = int(top) + (self.fontMetrics().height() - box) // 2
+            painter.drawRect(left, box_top, box, box)
+            middle = box_top + box // 2
+            painter.drawLine(left + 2, middle, left + box - 2, middle)
+            if line_number in self.folded_lines:
+                center = left + box // 2
+                painter.drawLine(center, box_top + 2, center, box_top + box - 2)
+
+    def _shift_fold_index(self, position, chars_removed, chars_added):
+        """
+        Keeps fold ranges aligned with the text between two full rebuilds. Only the line numbers are
+        shifted by the edit's line delta; the ranges themselves come from the last successful parse.
+        """
+        document = self.document()
+        block_count = document.blockCount()
+        delta = block_count - self._last_block_count
+        self._last_block_count = block_count
+        if not delta or not self.fold_ranges:
+            return
+        edit_block = document.findBlock(position)
+        edit_line = edit_block.blockNumber() + 1
+        # The edited line is split at the cursor. Text typed at its start pushes all of it down;
+        # text added at its end leaves all of it in place, like typing at the start of the next line.
+        # In between, a start tag is assumed to stay above the split and an end tag to move below it.
+        starts_move = ends_move = True
+        if delta > 0 and position != edit_block.position():
+            starts_move = False
+            end_block = document.findBlock(position + chars_added)
+            ends_move = position + chars_added != end_block.position() + end_block.length() - 1
+
+        def shift(line, moves):
+            if delta < 0:
+                # Lines after the edited one were removed; tags on them now sit on the edited line.
+                return line + delta if line > edit_line - delta else min(line, edit_line)
+            return line + delta if line > edit_line or (line == edit_line and moves) else line
+
+        shifted = {}
+        for start_line, (end_line, depth) in self.fold_ranges.items():
+            start_line = shift(start_line, starts_move)
+            end_line = shift(end_line, ends_move)
+            if end_line > start_line and (start_line not in shifted or depth < shifted[start_line][1]):
+                shifted[start_line] = (end_line, depth)
+        self.fold_ranges = shifted
+        self.folded_lines = {shift(line, starts_move) for line in self.folded_lines}
+        self.folded_lines &= shifted.keys()
+
+    def _schedule_lint(self):
+        if not self.lint_enabled:
+            return
+        if self.lint_cancel_event is not None:
+            self.lint_cancel_event.set()
+        self.lint_timer.start()
+
+    def run_lint(self):
+        text = self.toPlainText()
+        if not text.strip():
+            self.set_diagnostics('lint', {})
+            return
+        self.lint_generation += 1
+        generation = self.lint_generation
+        self.lint_cancel_event = threading.Event()
+
+        def apply(error):
+            if generation != self.lint_generation:
+                return  # A newer check has been started since.
+            self.set_diagnostics('lint', {error[0]: error[1]} if error else {})
+
+        run_in_background(check_well_formed, text, self.lint_cancel_event, on_finished=apply)
+
+    def rebuild_fold_index(self):
+        text = self.toPlainText()
+        if not text.strip():
+            self.set_fold_ranges({})
+            return
+        self.fold_index_generation += 1
+        generation = self.fold_index_generation
+        revision = self.document().revision()
+
+        def apply(ranges):
+            if generation == self.fold_index_generation and revision == self.document().revision():
+                self.set_fold_ranges(ranges)
+
+        # While the XML is not well-formed, the shifted ranges from the last good parse are kept.
+        run_in_background(build_element_ranges, text, on_finished=apply)
+
+    def set_fold_ranges(self, ranges):
+        self.fold_ranges = ranges
+        stale = {line for line in self.folded_lines if line not in ranges}
+        if stale:
+            self.folded_lines -= stale
+            self._refresh_block_visibility(1, self.document().blockCount())
+        self.foldArea.update()
+
+    def toggle_fold_at_y(self, y):
+        line_number = self.cursorForPosition(QPoint(0, int(y))).blockNumber() + 1
+        if line_number in self.fold_ranges:
+            self.toggle_fold(line_number)
+
+    def toggle_fold(self, line_number):
+        if line_number in self.folded_lines:
+            self.folded_lines.discard(line_number)
+        else:
+            self.folded_lines.add(line_number)
+        self._refresh_block_visibility(line_number, self.fold_ranges[line_number][0])
+
+    def fold_to_depth(self, depth):
+        """Folds every element nested `depth` levels or deeper below the root."""
+        self.folded_lines = {line for line, (_, element_depth) in self.fold_ranges.items() if element_depth >= depth}
+        self._refresh_block_visibility(1, self.document().blockCount())
+
+    def unfold_all(self):
+        self.folded_lines = set()
+        self._refresh_block_visibility(1, self.document().blockCount())
+
+    def _refresh_block_visibility(self, first_line, last_line):
+        """Shows or hides the blocks between two lines according to the folded ranges covering them."""
+        hidden = sorted((start + 1, self.fold_ranges[start][0]) for start in self.folded_lines
+                        if start < last_line and self.fold_ranges[start][0] > first_line)
+        document = self.document()
+        block = document.findBlockByNumber(first_line - 1)
+        start_position = block.position()
+        interval_index = 0
+        hidden_until = 0
+        while block.isValid() and block.blockNumber() < last_line:
+            line_number = block.blockNumber() + 1
+            while interval_index < len(hidden) and hidden[interval_index][0] <= line_number:
+                hidden_until = max(hidden_until, hidden[interval_index][1])
+                interval_index += 1
+            visible = line_number > hidden_until
+            if block.isVisible() != visible:
+                block.setVisible(visible)
+                block.setLineCount(1 if visible else 0)
+            block = block.next()
+        end_position = block.position() if block.isValid() else document.characterCount()
+        document.markContentsDirty(start_position, end_position - start_position)
+
+        # Keep the cursor out of hidden text.
+        cursor = self.textCursor()
+        if not cursor.block().isVisible():
+            while cursor.block().isValid() and not cursor.block().isVisible():
+                cursor.setPosition(cursor.block().previous().position())
+            self.setTextCursor(cursor)
+        self.viewport().update()
+        self.lineNumberArea.update()
+        self.foldArea.update()
+
     def lineNumberAreaPaintEvent(self, event):
         painter = QPainter(self.lineNumberArea)
         if darkdetect.theme() == "Dark":
@@ -543,22 +2136,20 @@ class CodeEditor(QPlainTextEdit):
             painter.fillRect(event.rect(), QColor("#F0F0F0"))
             pen_color = Qt.black
 
-        block = self.firstVisibleBlock()
-        blockNumber = block.blockNumber()
-        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
-        bottom = top + self.blockBoundingRect(block).height()
-
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(blockNumber + 1)
-                painter.setPen(pen_color)
-                painter.drawText(0, int(top), self.lineNumberArea.width(), self.fontMetrics().height(),
-                                 Qt.AlignRight, number)
-            block = block.next()
-            top = bottom
-            bottom = top + self.blockBoundingRect(block).height()
-            blockNumber += 1
-            
+        marked_lines = set()
+        for markers in self.diagnostics.values():
+            marked_lines.update(markers)
+
+        for block, top, bottom in self._visible_blocks(event.rect()):
+            blockNumber = block.blockNumber()
+            number = str(blockNumber + 1)
+            if blockNumber + 1 in marked_lines:
+                painter.fillRect(1, int(top) + 2, DIAGNOSTIC_MARKER_WIDTH - 3, self.fontMetrics().height() - 4,
+                                 QColor("#E51400"))
+            painter.setPen(pen_color)
+            painter.drawText(0, int(top), self.lineNumberArea.width(), self.fontMetrics().height(),
+                             Qt.AlignRight, number)
+
     def copy_xpath_to_clipboard(self):
         try:
             xpath = self._generate_xpath_at_cursor()
@@ -597,6 +2188,12 @@ class CodeEditor(QPlainTextEdit):
         
         copy_xpath_action = context_menu.addAction("Copy XPath")
         copy_xpath_action.triggered.connect(self.copy_xpath_to_clipboard)
+
+        if self.symbol_index is not None:
+            definition_action = context_menu.addAction("Go to Definition")
+            definition_action.triggered.connect(self.definition_requested)
+            usages_action = context_menu.addAction("Find Usages")
+            usages_action.triggered.connect(self.usages_requested)
         
         if not self.isReadOnly():
             format_action = context_menu.addAction("Format")
@@ -623,14 +2220,19 @@ class CodeEditor(QPlainTextEdit):
         try:
             cursor = self.textCursor()
             original_pos = cursor.position()
-            original_text = self.toPlainText()
-
-            if not original_text.strip():
-                return
-
-            final_xml = format_xml_string(original_text)
+            xml_file = self.source_path()
+            if xml_file is not None:
+                # The file still matches the text, so it is read in chunks instead of copying the text.
+                final_xml = format_xml_string(None, xml_file)
+                unchanged = file_equals_stripped(xml_file, final_xml.encode('utf-8'))
+            else:
+                original_text = self.toPlainText()
+                if not original_text.strip():
+                    return
+                final_xml = format_xml_string(original_text)
+                unchanged = original_text.strip() == final_xml.strip()
 
-            if original_text.strip() != final_xml.strip():
+            if not unchanged:
                 self.setPlainText(final_xml)
                 self.document().setModified(True)
 
@@ -651,6 +2253,722 @@ class CodeEditor(QPlainTextEdit):
                 main_window.statusBar().showMessage(f"An unexpected error occurred: {e}", MESSAGE_LENGTH)
 
 
+class DiffView(QAbstractScrollArea):
+    """Side-by-side diff of two outputs. Only the rows inside the viewport are painted."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.max_line_length = 0
+        self.setFont(QFont("Consolas", 10))
+        if darkdetect.theme() == "Dark":
+            self.colors = {'background': QColor("#1e1e1e"), 'gutter': QColor("#2a2a2a"), 'text': QColor(Qt.lightGray),
+                           'delete': QColor("#5a1e1e"), 'insert': QColor("#1e4a1e"), 'replace': QColor("#4a4a1e"),
+                           'empty': QColor("#303030")}
+        else:
+            self.colors = {'background': QColor(Qt.white), 'gutter': QColor("#F0F0F0"), 'text': QColor(Qt.black),
+                           'delete': QColor("#ffd7d7"), 'insert': QColor("#d7ffd7"), 'replace': QColor("#fff5c0"),
+                           'empty': QColor("#e8e8e8")}
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.max_line_length = max((max(len(row[2] or ""), len(row[4] or "")) for row in rows), default=0)
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def _visible_row_count(self):
+        return max(1, self.viewport().height() // self.fontMetrics().height())
+
+    def _update_scrollbars(self):
+        visible_rows = self._visible_row_count()
+        self.verticalScrollBar().setRange(0, max(0, len(self.rows) - visible_rows))
+        self.verticalScrollBar().setPageStep(visible_rows)
+        char_width = self.fontMetrics().horizontalAdvance('9')
+        visible_chars = max(1, (self.viewport().width() // 2 - self._gutter_width()) // char_width)
+        self.horizontalScrollBar().setRange(0, max(0, self.max_line_length - visible_chars))
+        self.horizontalScrollBar().setPageStep(visible_chars)
+
+    def _gutter_width(self):
+        digits = len(str(max(1, len(self.rows))))
+        return 6 + self.fontMetrics().horizontalAdvance('9') * digits
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        painter.fillRect(event.rect(), self.colors['background'])
+
+        line_height = self.fontMetrics().height()
+        char_width = self.fontMetrics().horizontalAdvance('9')
+        half_width = self.viewport().width() // 2
+        gutter_width = self._gutter_width()
+        first_row = self.verticalScrollBar().value()
+        first_char = self.horizontalScrollBar().value()
+        visible_rows = self.rows[first_row:first_row + self._visible_row_count() + 1]
+
+        for index, (tag, old_no, old_line, new_no, new_line) in enumerate(visible_rows):
+            top = index * line_height
+            for side, (line_no, line) in enumerate(((old_no, old_line), (new_no, new_line))):
+                left = side * half_width
+                if line_no is None:
+                    painter.fillRect(left, top, half_width, line_height, self.colors['empty'])
+                elif tag != 'equal':
+                    painter.fillRect(left, top, half_width, line_height, self.colors[tag])
+                painter.fillRect(left, top, gutter_width, line_height, self.colors['gutter'])
+                if line_no is None:
+                    continue
+                painter.setPen(self.colors['text'])
+                painter.drawText(left, top, gutter_width - 3, line_height, Qt.AlignRight, str(line_no))
+                painter.setClipRect(left + gutter_width, top, half_width - gutter_width, line_height)
+                painter.drawText(left + gutter_width + 3 - first_char * char_width, top,
+                                 (len(line) + 1) * char_width, line_height, Qt.AlignLeft, line)
+                painter.setClipping(False)
+
+        painter.setPen(self.colors['gutter'])
+        painter.drawLine(half_width, 0, half_width, self.viewport().height())
+
+
+def parse_outline_tree(text, xml_file=None):
+    """Parses editor text (or the file behind it) for the outline, tolerating XML that is being edited."""
+    parser = etree.XMLParser(recover=True, huge_tree=True)
+    if xml_file is not None:
+        return etree.parse(xml_file, parser).getroot()
+    return etree.fromstring(text.encode('utf-8'), parser)
+
+
+class _OutlineNode:
+    __slots__ = ('element', 'parent', 'row', 'child_elements', 'child_lines', 'children')
+
+    def __init__(self, element, parent, row):
+        self.element = element
+        self.parent = parent
+        self.row = row
+        # Child elements and their source lines are read from lxml on first use; rows are created in batches.
+        self.child_elements = None
+        self.child_lines = None
+        self.children = []
+
+    def load_child_elements(self):
+        if self.child_elements is None:
+            self.child_elements = list(self.element.iterchildren(etree.Element))
+            self.child_lines = [child.sourceline or 0 for child in self.child_elements]
+        return self.child_elements
+
+    def has_child_elements(self):
+        if self.child_elements is not None:
+            return bool(self.child_elements)
+        return next(self.element.iterchildren(etree.Element), None) is not None
+
+
+class OutlineModel(QAbstractItemModel):
+    """
+    Element hierarchy over an lxml tree. Rows are only created when a node is expanded
+    (canFetchMore/fetchMore), so opening a document with millions of elements is instant.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.top = None
+
+    def set_root(self, root):
+        self.beginResetModel()
+        self.top = None
+        if root is not None:
+            self.top = _OutlineNode(None, None, 0)
+            self.top.child_elements = [root]
+            self.top.child_lines = [root.sourceline or 0]
+        self.endResetModel()
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self.top
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or column != 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        parent_node = index.internalPointer().parent
+        if parent_node is None or parent_node is self.top:
+            return QModelIndex()
+        return self.createIndex(parent_node.row, 0, parent_node)
+
+    def rowCount(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or parent.column() > 0:
+            return 0
+        return len(node.children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        return node is not None and (bool(node.children) or node.has_child_elements())
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        if node is None:
+            return False
+        if node.child_elements is None:
+            return node.has_child_elements()
+        return len(node.children) < len(node.child_elements)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        elements = node.load_child_elements()
+        start = len(node.children)
+        end = min(len(elements), start + OUTLINE_FETCH_BATCH)
+        if end <= start:
+            return
+        self.beginInsertRows(parent, start, end - 1)
+        node.children.extend(_OutlineNode(elements[row], node, row) for row in range(start, end))
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        element = index.internalPointer().element
+        if role == Qt.DisplayRole:
+            qname = etree.QName(element)
+            label = f"{element.prefix}:{qname.localname}" if element.prefix else qname.localname
+            for attr_key, attr_value in element.items():
+                attr_name = etree.QName(attr_key).localname
+                if attr_name in IDENTIFYING_ATTRIBUTES or attr_name == 'match':
+                    return f"{label} [@{attr_name}='{attr_value}']"
+            return label
+        if role == Qt.ToolTipRole:
+            return f"{get_detailed_xpath(element)}\nLine {element.sourceline}"
+        return None
+
+    def element_at(self, index):
+        return index.internalPointer().element if index.isValid() else None
+
+    def index_for_line(self, line_number):
+        """
+        Returns the index of the innermost element starting at or before line_number.
+        Descends one level at a time through each node's sorted child source lines,
+        fetching only the rows on the way down.
+        """
+        node = self.top
+        index = QModelIndex()
+        while node is not None:
+            node.load_child_elements()
+            row = bisect_right(node.child_lines, line_number) - 1
+            if row < 0:
+                break
+            while len(node.children) <= row:
+                self.fetchMore(index)
+            index = self.index(row, 0, index)
+            node = node.children[row]
+        return index
+
+
+class OutlineDock(QDockWidget):
+    """Outline of the XML or XSLT editor that last had focus, kept in sync with its cursor."""
+    def __init__(self, parent=None):
+        super().__init__("Outline", parent)
+        self.tree = QTreeView()
+        self.tree.setHeaderHidden(True)
+        self.tree.setUniformRowHeights(True)
+        self.model = OutlineModel(self)
+        self.tree.setModel(self.model)
+        self.tree.selectionModel().currentChanged.connect(self._on_current_changed)
+        self.setWidget(self.tree)
+
+        self.editor = None
+        self.dirty = False
+        self.generation = 0
+        self._syncing = False
+
+        self.rebuild_timer = QTimer(self)
+        self.rebuild_timer.setInterval(OUTLINE_REBUILD_DELAY_MS)
+        self.rebuild_timer.setSingleShot(True)
+        self.rebuild_timer.timeout.connect(self.rebuild)
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setInterval(OUTLINE_SYNC_DELAY_MS)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.timeout.connect(self.sync_to_cursor)
+
+    def set_editor(self, editor):
+        if editor is self.editor:
+            return
+        if self.editor is not None:
+            self.editor.textChanged.disconnect(self.rebuild_timer.start)
+            self.editor.cursorPositionChanged.disconnect(self.sync_timer.start)
+        self.editor = editor
+        editor.textChanged.connect(self.rebuild_timer.start)
+        editor.cursorPositionChanged.connect(self.sync_timer.start)
+        self.rebuild()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.dirty:
+            self.rebuild()
+
+    def rebuild(self):
+        if self.editor is None:
+            return
+        if not self.isVisible():
+            # Nothing is parsed while the dock is closed; it catches up when shown.
+            self.dirty = True
+            return
+        self.dirty = False
+        xml_file = self.editor.source_path()
+        text = None
+        if xml_file is None:
+            text = self.editor.toPlainText()
+            if not text.strip():
+                self.model.set_root(None)
+                return
+        self.generation += 1
+        generation = self.generation
+        editor = self.editor
+        revision = editor.document().revision()
+
+        def apply(root):
+            if generation == self.generation and editor is self.editor and revision == editor.document().revision():
+                self.model.set_root(root)
+                self.sync_to_cursor()
+
+        run_in_background(parse_outline_tree, text, xml_file, on_finished=apply)
+
+    def sync_to_cursor(self):
+        if self.editor is None or self.model.top is None or not self.isVisible():
+            return
+        index = self.model.index_for_line(self.editor.textCursor().blockNumber() + 1)
+        if index.isValid():
+            self._syncing = True
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
+            self._syncing = False
+
+    def _on_current_changed(self, current, previous):
+        element = self.model.element_at(current)
+        if self._syncing or element is None or self.editor is None or not element.sourceline:
+            return
+        block = self.editor.document().findBlockByNumber(element.sourceline - 1)
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position())
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+
+
+_XSLT_MARKUP = re.compile(r'<!--|<(/?)([\w.-]+(?::[\w.-]+)?)')
+_XSLT_TAG_PART = re.compile(r'/?>|([\w.-]+(?::[\w.-]+)?)\s*=\s*(["\'])')
+_XSLT_VARIABLE_REFERENCE = re.compile(r'\$([\w.-]+(?::[\w.-]+)?)')
+_XSLT_FUNCTION_CALL = re.compile(r'(?<![\w.:$-])([\w.-]+:[\w.-]+)\s*\(')
+_XSLT_AVT = re.compile(r'\{([^{}]*)\}')
+_XSLT_BLOCK_ELEMENTS = ('xsl:template', 'xsl:function')
+SYMBOL_KIND_LABELS = (('template', "Named Templates"), ('match', "Match Templates"), ('mode', "Modes"),
+                      ('function', "Functions"), ('variable', "Global Variables"), ('param', "Global Parameters"))
+
+def symbol_key(kind, name):
+    """Variables and parameters share one namespace in XPath, so both are looked up as 'variable'."""
+    return ('variable' if kind in ('variable', 'param') else kind), name
+
+def _xslt_tag_symbols(tag, attrs, line_offset, depth, declarations, references):
+    values = attrs.values() if tag.startswith('xsl:') else [expr for value in attrs.values()
+                                                             for expr in _XSLT_AVT.findall(value)]
+    for value in values:
+        references.extend(('variable', name, line_offset) for name in _XSLT_VARIABLE_REFERENCE.findall(value))
+        references.extend(('function', name, line_offset) for name in _XSLT_FUNCTION_CALL.findall(value))
+
+    modes = [mode for mode in attrs.get('mode', '').split() if not mode.startswith('#')]
+    if tag == 'xsl:template':
+        if 'name' in attrs:
+            declarations.append(('template', attrs['name'], None, line_offset, depth))
+        if 'match' in attrs:
+            declarations.append(('match', attrs['match'], attrs.get('mode'), line_offset, depth))
+        declarations.extend(('mode', mode, None, line_offset, depth) for mode in modes)
+    elif tag in ('xsl:function', 'xsl:variable', 'xsl:param') and 'name' in attrs:
+        declarations.append((tag[4:], attrs['name'], None, line_offset, depth))
+    elif tag == 'xsl:mode' and 'name' in attrs:
+        declarations.append(('mode', attrs['name'], None, line_offset, depth))
+    elif tag in ('xsl:include', 'xsl:import') and 'href' in attrs:
+        declarations.append(('module', attrs['href'], None, line_offset, depth))
+    elif tag == 'xsl:call-template' and 'name' in attrs:
+        references.append(('template', attrs['name'], line_offset))
+    elif tag == 'xsl:apply-templates':
+        references.extend(('mode', mode, line_offset) for mode in modes)
+
+def scan_xslt_line(text, state):
+    """
+    Scans one line of a stylesheet, starting in the lexer state left by the previous line.
+    Returns (end_state, depth_delta, declarations, references). A start tag is reported on the line
+    where it closes, with a negative line offset back to where it began; depth counts open
+    xsl:template and xsl:function elements, which tells global variables from local ones.
+    Only the conventional xsl prefix is recognized.
+    """
+    declarations = []
+    references = []
+    depth = 0
+    pos = 0
+    while True:
+        if state is None:
+            match = _XSLT_MARKUP.search(text, pos)
+            if match is None:
+                break
+            pos = match.end()
+            if match.group(0) == '<!--':
+                state = ('comment',)
+            elif match.group(1):
+                if match.group(2) in _XSLT_BLOCK_ELEMENTS:
+                    depth -= 1
+            else:
+                state = ('tag', match.group(2), (), 0)
+        elif state[0] == 'comment':
+            end = text.find('-->', pos)
+            if end < 0:
+                break
+            pos = end + 3
+            state = None
+        elif state[0] == 'tag':
+            match = _XSLT_TAG_PART.search(text, pos)
+            if match is None:
+                break
+            pos = match.end()
+            _, tag, attrs, lines_back = state
+            if match.group(1):
+                state = ('value', tag, attrs, lines_back, match.group(1), match.group(2), "")
+            else:
+                _xslt_tag_symbols(tag, dict(attrs), -lines_back, depth, declarations, references)
+                if tag in _XSLT_BLOCK_ELEMENTS and match.group(0) == '>':
+                    depth += 1
+                state = None
+        else:
+            _, tag, attrs, lines_back, attr_name, quote, partial = state
+            end = text.find(quote, pos)
+            if end < 0:
+                state = ('value', tag, attrs, lines_back, attr_name, quote, partial + text[pos:] + "\n")
+                break
+            state = ('tag', tag, attrs + ((attr_name, partial + text[pos:end]),), lines_back)
+            pos = end + 1
+
+    # Tags left open continue on the next line, one line further from where they started.
+    if state is not None and state[0] != 'comment':
+        state = state[:3] + (state[3] + 1,) + state[4:]
+    return state, depth, declarations, references
+
+
+class XsltSymbolIndex(QObject):
+    """
+    Templates, modes, functions, variables and parameters of a stylesheet, with the references to them,
+    kept per line. Attached to a document, an edit rescans only the changed lines, plus the following
+    lines whose lexer state it changed (e.g. after opening a comment or a multi-line tag).
+    """
+    changed = Signal()
+
+    def __init__(self, document=None, parent=None):
+        super().__init__(parent)
+        # Per line: (start_state, end_state, depth_delta, declarations, references)
+        self.lines = []
+        self.document = document
+        if document is not None:
+            document.contentsChange.connect(self._on_contents_change)
+            self._on_contents_change(0, 0, document.characterCount())
+
+    @classmethod
+    def from_text(cls, text):
+        index = cls()
+        index.replace_lines(0, 0, text.split("\n"), None)
+        return index
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        if not chars_removed and not chars_added:
+            return  # Formatting only, e.g. from the highlighter.
+        document = self.document
+        first_block = document.findBlock(position)
+        last_block = document.findBlock(position + chars_added)
+        first = first_block.blockNumber()
+        last = last_block.blockNumber() if last_block.isValid() else document.blockCount() - 1
+        removed = max(0, (last - first + 1) - (document.blockCount() - len(self.lines)))
+        new_lines = []
+        block = first_block
+        while block.isValid() and block.blockNumber() <= last:
+            new_lines.append(block.text())
+            block = block.next()
+        self.replace_lines(first, removed, new_lines, lambda line: document.findBlockByNumber(line).text())
+        self.changed.emit()
+
+    def replace_lines(self, first, removed, new_lines, line_text):
+        """Replaces `removed` lines at `first` with new_lines; line_text(n) returns line n of the new text."""
+        state = self.lines[first - 1][1] if first else None
+        records = []
+        for text in new_lines:
+            record = (state,) + scan_xslt_line(text, state)
+            records.append(record)
+            state = record[1]
+        self.lines[first:first + removed] = records
+
+        line = first + len(records)
+        while line < len(self.lines) and self.lines[line][0] != state:
+            record = (state,) + scan_xslt_line(line_text(line), state)
+            self.lines[line] = record
+            state = record[1]
+            line += 1
+
+    def declarations(self):
+        """Yields (kind, name, detail, line, top_level) with 1-based lines."""
+        depth = 0
+        for line, record in enumerate(self.lines):
+            for kind, name, detail, line_offset, depth_at in record[3]:
+                yield kind, name, detail, line + line_offset + 1, depth + depth_at <= 0
+            depth += record[2]
+
+    def references(self):
+        """Yields (kind, name, line) with 1-based lines."""
+        for line, record in enumerate(self.lines):
+            for kind, name, line_offset in record[4]:
+                yield kind, name, line + line_offset + 1
+
+    def symbols(self):
+        """Returns the declarations shown in the symbol list: everything but local variables and parameters."""
+        return [(kind, name, detail, line) for kind, name, detail, line, top_level in self.declarations()
+                if kind != 'module' and (top_level or kind not in ('variable', 'param'))]
+
+    def module_hrefs(self):
+        return [name for kind, name, _, _, _ in self.declarations() if kind == 'module']
+
+    def definitions(self, key, at_line=None):
+        """
+        Returns the lines declaring key. For a variable referenced inside a template or function at
+        at_line, the last local declaration before it in that template is returned instead.
+        """
+        if at_line is not None and sum(record[2] for record in self.lines[:at_line - 1]) <= 0:
+            at_line = None  # Not inside a template or function.
+        found = []
+        local = None
+        for kind, name, _, line, top_level in self.declarations():
+            if at_line is not None and line <= at_line and top_level and kind in ('template', 'match', 'function'):
+                local = None  # A later template or function still starts before the reference.
+            if symbol_key(kind, name) != key:
+                continue
+            if top_level or kind not in ('variable', 'param'):
+                found.append(line)
+            elif at_line is not None and line <= at_line:
+                local = line
+        return [local] if local is not None else found
+
+    def usages(self, key):
+        return [line for kind, name, line in self.references() if (kind, name) == key]
+
+
+def symbol_at(line_text, column):
+    """Returns the symbol key under a 0-based column of a stylesheet line, or None."""
+    patterns = ((_XSLT_VARIABLE_REFERENCE, 'variable'), (_XSLT_FUNCTION_CALL, 'function'),
+                (re.compile(r'<xsl:(?:call-template|template)\b[^>]*?\bname\s*=\s*["\']([^"\']*)'), 'template'),
+                (re.compile(r'<xsl:function\b[^>]*?\bname\s*=\s*["\']([^"\']*)'), 'function'),
+                (re.compile(r'<xsl:(?:variable|param)\b[^>]*?\bname\s*=\s*["\']([^"\']*)'), 'variable'))
+    for pattern, kind in patterns:
+        for match in pattern.finditer(line_text):
+            if match.start() <= column <= match.end():
+                return kind, match.group(1)
+    for match in re.finditer(r'\bmode\s*=\s*["\']([^"\']*)', line_text):
+        start = match.start(1)
+        for mode in match.group(1).split():
+            start = line_text.index(mode, start)
+            if start <= column <= start + len(mode):
+                return 'mode', mode
+            start += len(mode)
+    return None
+
+
+class SymbolDock(QDockWidget):
+    """
+    Symbol list of the XSLT editor and the modules it includes or imports, plus the results
+    of Go to Definition and Find Usages.
+    """
+    def __init__(self, parent=None):
+        super().__init__("Symbols", parent)
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter")
+        self.filter_input.textChanged.connect(self._apply_filter)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Symbol", "Location"])
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemActivated.connect(self._on_item_activated)
+        self.tree.itemClicked.connect(self._on_item_activated)
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.filter_input)
+        layout.addWidget(self.tree)
+        self.setWidget(container)
+
+        self.editor = None
+        self.stylesheet_path = lambda: None
+        self.module_indexes = {}  # {path: (mtime, XsltSymbolIndex)}
+        self.results = None  # (title, [(path, line)]) of the last Find Usages
+        self.dirty = False
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(SYMBOL_LIST_DELAY_MS)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def set_editor(self, editor, stylesheet_path):
+        """stylesheet_path returns the editor's file path, against which includes are resolved."""
+        self.editor = editor
+        self.stylesheet_path = stylesheet_path
+        editor.symbol_index.changed.connect(self.refresh_timer.start)
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.dirty:
+            self.refresh()
+
+    def _modules(self):
+        """Returns [(path, index)] for every module reachable through xsl:include/xsl:import."""
+        modules = []
+        seen = set()
+        pending = [(stylesheet_base_uri(self.stylesheet_path()), self.editor.symbol_index)]
+        while pending:
+            base_uri, index = pending.pop(0)
+            for href in index.module_hrefs():
+                path = _uri_to_path(urljoin(base_uri, href))
+                if not path or path in seen or not os.path.isfile(path):
+                    continue
+                seen.add(path)
+                mtime = os.path.getmtime(path)
+                cached = self.module_indexes.get(path)
+                if cached is None or cached[0] != mtime:
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            cached = (mtime, XsltSymbolIndex.from_text(f.read()))
+                    except (OSError, UnicodeDecodeError) as e:
+                        print(f"Could not index {path}: {e}")
+                        continue
+                    self.module_indexes[path] = cached
+                modules.append((path, cached[1]))
+                pending.append((Path(path).as_uri(), cached[1]))
+        return modules
+
+    def refresh(self):
+        if self.editor is None:
+            return
+        if not self.isVisible():
+            self.dirty = True
+            return
+        self.dirty = False
+        sources = [(None, self.editor.symbol_index)] + self._modules()
+        groups = {kind: [] for kind, _ in SYMBOL_KIND_LABELS}
+        seen_modes = set()
+        for path, index in sources:
+            for kind, name, detail, line in index.symbols():
+                if kind == 'mode':
+                    if name in seen_modes:
+                        continue
+                    seen_modes.add(name)
+                label = f"{name} (mode {detail})" if kind == 'match' and detail else name
+                groups[kind].append((label, path, line))
+
+        self.tree.setUpdatesEnabled(False)
+        self.tree.clear()
+        if self.results is not None:
+            title, locations = self.results
+            self._add_group(f"{title} ({len(locations)})", self._usage_entries(locations), expanded=True)
+        for kind, title in SYMBOL_KIND_LABELS:
+            self._add_group(f"{title} ({len(groups[kind])})", groups[kind])
+        self._apply_filter(self.filter_input.text())
+        self.tree.setUpdatesEnabled(True)
+
+    def _add_group(self, title, entries, expanded=False):
+        group = QTreeWidgetItem(self.tree, [title])
+        for label, path, line in entries:
+            location = f"{os.path.basename(path)}:{line}" if path else str(line)
+            item = QTreeWidgetItem(group, [label, location])
+            item.setData(0, Qt.UserRole, (path, line))
+        group.setExpanded(expanded)
+
+    def _usage_entries(self, locations):
+        """Labels each usage with its source line."""
+        file_lines = {}
+        entries = []
+        for path, line in locations:
+            if path is None:
+                text = self.editor.document().findBlockByNumber(line - 1).text()
+            else:
+                if path not in file_lines:
+                    try:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            file_lines[path] = f.read().splitlines()
+                    except (OSError, UnicodeDecodeError):
+                        file_lines[path] = []
+                text = file_lines[path][line - 1] if line <= len(file_lines[path]) else ""
+            entries.append((text.strip(), path, line))
+        return entries
+
+    def _apply_filter(self, text):
+        text = text.lower()
+        for row in range(self.tree.topLevelItemCount()):
+            group = self.tree.topLevelItem(row)
+            for child_row in range(group.childCount()):
+                child = group.child(child_row)
+                child.setHidden(bool(text) and text not in child.text(0).lower())
+
+    def _on_item_activated(self, item, column=0):
+        location = item.data(0, Qt.UserRole)
+        if location:
+            self._show_location(*location)
+
+    def _show_location(self, path, line):
+        if path is not None:
+            self.window().statusBar().showMessage(f"{os.path.basename(path)}, line {line}: {path}", MESSAGE_LENGTH)
+            return
+        block = self.editor.document().findBlockByNumber(line - 1)
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position())
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
+
+    def _symbol_under_cursor(self):
+        cursor = self.editor.textCursor()
+        key = symbol_at(cursor.block().text(), cursor.positionInBlock())
+        if key is None:
+            self.window().statusBar().showMessage("No template, mode, function or variable at the cursor.",
+                                                  MESSAGE_LENGTH)
+        return key, cursor.blockNumber() + 1
+
+    def go_to_definition(self):
+        if self.editor is None:
+            return
+        key, line = self._symbol_under_cursor()
+        if key is None:
+            return
+        locations = [(None, found) for found in self.editor.symbol_index.definitions(key, line)]
+        if not locations:
+            locations = [(path, found) for path, index in self._modules() for found in index.definitions(key)]
+        if not locations:
+            self.window().statusBar().showMessage(f"No definition found for {key[1]}.", MESSAGE_LENGTH)
+            return
+        self._show_location(*locations[0])
+        if len(locations) > 1:
+            self.window().statusBar().showMessage(f"{len(locations)} definitions of {key[1]}.", MESSAGE_LENGTH)
+
+    def find_usages(self):
+        if self.editor is None:
+            return
+        key, _ = self._symbol_under_cursor()
+        if key is None:
+            return
+        locations = [(None, line) for line in self.editor.symbol_index.usages(key)]
+        locations += [(path, line) for path, index in self._modules() for line in index.usages(key)]
+        self.results = (f"Usages of {key[1]}", locations)
+        self.show()
+        self.raise_()
+        self.refresh()
+        self.window().statusBar().showMessage(f"{len(locations)} usage(s) of {key[1]}.", MESSAGE_LENGTH)
+
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -660,6 +2978,18 @@ class MainWindow(QMainWindow):
         
         self.xml_file_path = None
         self.xslt_file_path = None
+        self.previous_output = None
+        self.current_output = None
+        self.diff_generation = 0
+        self.diff_cancel_event = None
+        self.stylesheet_cache = StylesheetCache(self)
+        self.schema_cache = SchemaCache()
+        self.input_schema_paths = []
+        self.output_schema_paths = []
+        self.transform_generation = 0
+        self.worker_pool = None
+        self.partition_split_on = ""
+        self.partition_wrapper = ""
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -715,12 +3045,101 @@ class MainWindow(QMainWindow):
         edit_menu.addSeparator()
         edit_menu.addAction(self.copy_xpath_action)
         edit_menu.addAction(self.format_action)
+        edit_menu.addSeparator()
+        export_xpaths_action = QAction("Export All XPaths...", self)
+        export_xpaths_action.triggered.connect(self.export_all_xpaths)
+        edit_menu.addAction(export_xpaths_action)
+        edit_menu.addSeparator()
+        go_to_definition_action = QAction("Go to Definition", self)
+        go_to_definition_action.setShortcut(QKeySequence(Qt.Key_F12))
+        edit_menu.addAction(go_to_definition_action)
+        find_usages_action = QAction("Find Usages", self)
+        find_usages_action.setShortcut(QKeySequence("Shift+F12"))
+        edit_menu.addAction(find_usages_action)
 
         self.find_action.triggered.connect(self.find_in_active_editor)
         self.replace_action.triggered.connect(self.replace_in_active_editor)
         self.copy_xpath_action.triggered.connect(self.copy_xpath_in_active_editor)
         self.format_action.triggered.connect(self.format_in_active_editor)
 
+        view_menu = self.menu_bar.addMenu("&View")
+        self.show_diff_action = QAction("Show Output Diff", self)
+        self.show_diff_action.setCheckable(True)
+        self.show_diff_action.setShortcut(QKeySequence("Ctrl+Shift+D"))
+        self.show_diff_action.toggled.connect(self.toggle_output_diff)
+        view_menu.addAction(self.show_diff_action)
+
+        self.xml_aware_diff_action = QAction("XML-Aware Diff (Ignore Attribute Order and Whitespace)", self)
+        self.xml_aware_diff_action.setCheckable(True)
+        self.xml_aware_diff_action.toggled.connect(self.refresh_output_diff)
+        view_menu.addAction(self.xml_aware_diff_action)
+        view_menu.addSeparator()
+
+        self.outline_dock = OutlineDock(self)
+        self.outline_dock.setObjectName("outline_dock")
+        self.addDockWidget(Qt.RightDockWidgetArea, self.outline_dock)
+        self.outline_dock.hide()
+        view_menu.addAction(self.outline_dock.toggleViewAction())
+
+        self.symbol_dock = SymbolDock(self)
+        self.symbol_dock.setObjectName("symbol_dock")
+        self.addDockWidget(Qt.RightDockWidgetArea, self.symbol_dock)
+        self.symbol_dock.hide()
+        view_menu.addAction(self.symbol_dock.toggleViewAction())
+        view_menu.addSeparator()
+        go_to_definition_action.triggered.connect(self.symbol_dock.go_to_definition)
+        find_usages_action.triggered.connect(self.symbol_dock.find_usages)
+
+        fold_to_depth_action = QAction("Fold to Depth...", self)
+        fold_to_depth_action.triggered.connect(self.fold_active_editor_to_depth)
+        view_menu.addAction(fold_to_depth_action)
+
+        unfold_all_action = QAction("Unfold All", self)
+        unfold_all_action.triggered.connect(lambda: (self._get_active_editor() or self.xml_editor).unfold_all())
+        view_menu.addAction(unfold_all_action)
+
+        transform_menu = self.menu_bar.addMenu("&Transform")
+        self.isolated_transform_action = QAction("Run in Isolated Worker Process", self)
+        self.isolated_transform_action.setCheckable(True)
+        self.isolated_transform_action.setToolTip(
+            f"Run transformations in separate processes limited to {TRANSFORM_MEMORY_LIMIT_MB} MB "
+            f"and {TRANSFORM_CPU_TIME_LIMIT} s of CPU time.")
+        self.isolated_transform_action.toggled.connect(self.toggle_isolated_transform)
+        transform_menu.addAction(self.isolated_transform_action)
+
+        partitioned_transform_action = QAction("Partitioned Transform to File...", self)
+        partitioned_transform_action.setToolTip("Transform record-oriented XML in chunks on parallel worker processes.")
+        partitioned_transform_action.triggered.connect(self.transform_partitioned)
+        transform_menu.addAction(partitioned_transform_action)
+
+        benchmark_action = QAction("Benchmark Transform...", self)
+        benchmark_action.triggered.connect(self.benchmark)
+        transform_menu.addAction(benchmark_action)
+
+        validation_menu = self.menu_bar.addMenu("Va&lidation")
+        set_input_schema_action = QAction("Set Input Schema...", self)
+        set_input_schema_action.triggered.connect(self.set_input_schema)
+        validation_menu.addAction(set_input_schema_action)
+
+        set_output_schema_action = QAction("Set Output Schema...", self)
+        set_output_schema_action.triggered.connect(self.set_output_schema)
+        validation_menu.addAction(set_output_schema_action)
+
+        clear_schemas_action = QAction("Clear Schemas", self)
+        clear_schemas_action.triggered.connect(self.clear_schemas)
+        validation_menu.addAction(clear_schemas_action)
+        validation_menu.addSeparator()
+
+        validate_input_action = QAction("Validate Input", self)
+        validate_input_action.triggered.connect(
+            lambda: self._validate_against_schema(self.xml_editor, self.input_schema_paths, "XML input"))
+        validation_menu.addAction(validate_input_action)
+
+        validate_output_action = QAction("Validate Output", self)
+        validate_output_action.triggered.connect(
+            lambda: self._validate_against_schema(self.output_editor, self.output_schema_paths, "Output"))
+        validation_menu.addAction(validate_output_action)
+
         QApplication.instance().focusChanged.connect(self.handle_focus_change)
         self.handle_focus_change(None, None) # Set initial state
 
@@ -755,6 +3174,9 @@ class MainWindow(QMainWindow):
         self.output_editor.setReadOnly(True)
         self.output_editor.setContextMenuPolicy(Qt.NoContextMenu)
         output_layout.addWidget(self.output_editor)
+        self.diff_view = DiffView()
+        self.diff_view.setVisible(False)
+        output_layout.addWidget(self.diff_view)
         self.output_group.setLayout(output_layout)
 
         main_splitter.addWidget(top_splitter)
@@ -771,6 +3193,19 @@ class MainWindow(QMainWindow):
         self.xslt_editor.xpath_changed.connect(self.update_xpath_label)
         self.output_editor.xpath_changed.connect(self.update_xpath_label)
         
+        self.xml_editor.lint_enabled = True
+        self.xslt_editor.lint_enabled = True
+        self.outline_dock.set_editor(self.xml_editor)
+
+        self.xslt_editor.symbol_index = XsltSymbolIndex(self.xslt_editor.document(), self.xslt_editor)
+        self.xslt_editor.definition_requested.connect(self.symbol_dock.go_to_definition)
+        self.xslt_editor.usages_requested.connect(self.symbol_dock.find_usages)
+        self.symbol_dock.set_editor(self.xslt_editor, lambda: self.xslt_file_path)
+
+        # Schema errors refer to the text that was validated, so they go away on the next edit.
+        self.xml_editor.textChanged.connect(lambda: self.xml_editor.set_diagnostics('schema', {}))
+        self.output_editor.textChanged.connect(lambda: self.output_editor.set_diagnostics('schema', {}))
+
         self.xml_editor.document().modificationChanged.connect(
             lambda modified: self.on_modification_changed(modified, self.xml_group, "XML Input", self.xml_file_path, self.save_xml_action)
         )
@@ -822,8 +3257,38 @@ class MainWindow(QMainWindow):
         if editor and not editor.isReadOnly():
             editor.pretty_print_xml()
 
+    def export_all_xpaths(self):
+        editor = self._get_active_editor() or self.xml_editor
+        xml_file = editor.source_path()
+        text = None if xml_file else editor.toPlainText()
+        if xml_file is None and not text.strip():
+            self.statusBar().showMessage("Nothing to export.", MESSAGE_LENGTH)
+            return
+        filepath, selected_filter = QFileDialog.getSaveFileName(self, "Export All XPaths", "",
+                                                                "CSV Files (*.csv);;JSON Lines (*.jsonl)")
+        if not filepath:
+            return
+        output_format = 'jsonl' if 'jsonl' in selected_filter or '.jsonl' in filepath.lower() else 'csv'
+        self.statusBar().showMessage("Exporting XPaths...", MESSAGE_LENGTH)
+        run_in_background(export_xpaths_to_file, filepath, output_format, xml_file=xml_file, xml_text=text,
+                          on_finished=lambda count: self.statusBar().showMessage(
+                              f"Exported {count} XPaths to {filepath}", MESSAGE_LENGTH),
+                          on_failed=lambda error: self.statusBar().showMessage(
+                              f"Export XPaths Error: {error}", MESSAGE_LENGTH))
+
+    def fold_active_editor_to_depth(self):
+        editor = self._get_active_editor() or self.xml_editor
+        depth, ok = QInputDialog.getInt(self, "Fold to Depth", "Fold elements nested at least this deep:", 1, 0, 100)
+        if ok:
+            if editor.fold_index_timer.isActive():
+                editor.fold_index_timer.stop()
+                editor.set_fold_ranges(build_element_ranges(editor.toPlainText()))
+            editor.fold_to_depth(depth)
+
     def handle_focus_change(self, old_widget, new_widget):
         active_editor = self._get_active_editor()
+        if active_editor is not None and active_editor in (self.xml_editor, self.xslt_editor):
+            self.outline_dock.set_editor(active_editor)
         is_editable = bool(active_editor and not active_editor.isReadOnly())
 
         self.find_action.setEnabled(bool(active_editor))
@@ -865,7 +3330,14 @@ class MainWindow(QMainWindow):
         filepath, _ = QFileDialog.getOpenFileName(self, title, "", file_filter)
         if filepath:
             try:
-                with open(filepath, 'r', encoding='utf-8') as f:
+                member = None
+                if compression_suffix(filepath) == '.zip':
+                    members = zip_members(filepath)
+                    if len(members) > 1:
+                        member, ok = QInputDialog.getItem(self, title, "File in archive:", members, 0, False)
+                        if not ok:
+                            return None
+                with TextIOWrapper(open_xml_input(filepath, member), encoding='utf-8') as f:
                     content = f.read()
                 
                 formatted = False
@@ -878,6 +3350,8 @@ class MainWindow(QMainWindow):
 
                 editor.setPlainText(content)
                 editor.document().setModified(False)
+                if not formatted and not compression_suffix(filepath):
+                    editor.set_source_file(filepath)
                 # Manually trigger the title update after loading a new file.
                 self.on_modification_changed(False, group, default_title, filepath, action_save)
                 
@@ -889,23 +3363,26 @@ class MainWindow(QMainWindow):
         return None
 
     def open_xml_file(self):
-        filepath = self._load_file("Open XML File", "XML Files (*.xml);;All Files (*)", 
+        filepath = self._load_file("Open XML File", f"XML Files (*.xml {COMPRESSED_XML_PATTERNS} *.zip);;All Files (*)",
                                    self.xml_editor, self.xml_group, self.save_xml_action, "XML Input")
         if filepath:
-            self.xml_file_path = filepath
+            # Saving must not replace a whole archive with the one file taken from it.
+            self.xml_file_path = None if compression_suffix(filepath) == '.zip' else filepath
 
     def open_xslt_file(self):
         filepath = self._load_file("Open XSLT File", "XSLT Files (*.xsl *.xslt);;All Files (*)", 
                                    self.xslt_editor, self.xslt_group, self.save_xslt_action, "XSLT Stylesheet")
         if filepath:
-            self.xslt_file_path = filepath
+            self.xslt_file_path = None if compression_suffix(filepath) == '.zip' else filepath
     
     def _save_file(self, file_path, editor):
         try:
             content = editor.toPlainText()
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with open_output_file(file_path, encoding='utf-8') as f:
                 f.write(content)
             editor.document().setModified(False)
+            if not compression_suffix(file_path):
+                editor.set_source_file(file_path)
             self.statusBar().showMessage(f"Saved to {file_path}", MESSAGE_LENGTH)
             return True
         except Exception as e:
@@ -926,7 +3403,8 @@ class MainWindow(QMainWindow):
             self.save_xml_as()
 
     def save_xml_as(self):
-        filepath = self._save_file_as("Save XML As", "XML Files (*.xml);;All Files (*)", self.xml_editor)
+        filepath = self._save_file_as("Save XML As", f"XML Files (*.xml);;Compressed XML ({COMPRESSED_XML_PATTERNS});;"
+                                      "All Files (*)", self.xml_editor)
         if filepath:
             self.xml_file_path = filepath
 
@@ -947,38 +3425,547 @@ class MainWindow(QMainWindow):
         elif self.xslt_editor.hasFocus():
             self.save_xslt()
 
+    def _xml_input(self):
+        """Returns (xml_text, xml_file): the file while the XML editor still matches it, so it is not re-encoded."""
+        xml_file = self.xml_editor.source_path()
+        if xml_file:
+            return None, xml_file
+        return self.xml_editor.toPlainText(), None
+
     def transform(self):
-        xml_input = self.xml_editor.toPlainText()
+        xml_input, xml_file = self._xml_input()
         xslt_input = self.xslt_editor.toPlainText()
 
-        if not xml_input.strip() or not xslt_input.strip():
+        if (xml_file is None and not xml_input.strip()) or not xslt_input.strip():
             self.statusBar().showMessage("XML and XSLT inputs cannot be empty.", MESSAGE_LENGTH)
             return
 
+        self._validate_against_schema(self.xml_editor, self.input_schema_paths, "XML input")
+        self.transform_generation += 1
+        generation = self.transform_generation
+
+        if self.isolated_transform_action.isChecked():
+            self.statusBar().showMessage("Transforming in a worker process...", MESSAGE_LENGTH)
+            run_in_background(self._get_worker_pool().transform, xslt_input, xml_text=xml_input, xml_file=xml_file,
+                              stylesheet_path=self.xslt_file_path,
+                              on_finished=lambda result: self._show_transform_output(generation, *result),
+                              on_failed=lambda error: self._show_transform_error(generation, error))
+            return
+
         try:
-            with PySaxonProcessor(license=False) as proc:
-                xslt_proc = proc.new_xslt30_processor()
-                document = proc.parse_xml(xml_text=xml_input)
-                
-                if not document:
-                    self.statusBar().showMessage("Error parsing XML.", MESSAGE_LENGTH)
-                    self.output_editor.setPlainText("Error parsing XML.")
-                    return
-                    
-                executable = xslt_proc.compile_stylesheet(stylesheet_text=xslt_input)
-                output = executable.transform_to_string(xdm_node=document)
-                
-                self.output_editor.setPlainText(output)
-                self.output_editor.pretty_print_xml()
-                self.statusBar().showMessage("Transformation successful.", MESSAGE_LENGTH)
+            document = parse_xml_input(self.stylesheet_cache.processor, xml_input, xml_file)
+
+            if not document:
+                self.statusBar().showMessage("Error parsing XML.", MESSAGE_LENGTH)
+                self.output_editor.setPlainText("Error parsing XML.")
+                return
+
+            executable, reused = self.stylesheet_cache.get_executable(xslt_input, self.xslt_file_path)
+            output = executable.transform_to_string(xdm_node=document)
+            self._show_transform_output(generation, output, reused)
 
         except Exception as e:
-            self.output_editor.setPlainText(str(e))
-            self.statusBar().showMessage("Transformation failed. See output for details.", MESSAGE_LENGTH)
+            self._show_transform_error(generation, str(e))
+
+    def _show_transform_output(self, generation, output, reused):
+        if generation != self.transform_generation:
+            return  # A newer transformation was started in the meantime.
+        self.output_editor.setPlainText(output)
+        self.output_editor.pretty_print_xml()
+        if reused:
+            self.statusBar().showMessage("Transformation successful (compiled stylesheet reused).", MESSAGE_LENGTH)
+        else:
+            self.statusBar().showMessage("Transformation successful.", MESSAGE_LENGTH)
+        self._record_output(self.output_editor.toPlainText())
+        self._validate_against_schema(self.output_editor, self.output_schema_paths, "Output")
+
+    def _show_transform_error(self, generation, message):
+        if generation != self.transform_generation:
+            return
+        self.output_editor.setPlainText(message)
+        self.statusBar().showMessage("Transformation failed. See output for details.", MESSAGE_LENGTH)
+
+    def transform_partitioned(self):
+        xml_input, xml_file = self._xml_input()
+        xslt_input = self.xslt_editor.toPlainText()
+        if (xml_file is None and not xml_input.strip()) or not xslt_input.strip():
+            self.statusBar().showMessage("XML and XSLT inputs cannot be empty.", MESSAGE_LENGTH)
+            return
+        title = "Partitioned Transform"
+        split_on, ok = QInputDialog.getText(self, title, "Record element name or path (e.g. record or /feed/record):",
+                                            text=self.partition_split_on)
+        if not ok or not split_on.strip():
+            return
+        chunk_size, ok = QInputDialog.getInt(self, title, "Records per chunk:", PARTITION_CHUNK_RECORDS, 1, 10000000)
+        if not ok:
+            return
+        wrapper, ok = QInputDialog.getText(self, title, "Output wrapper element (empty: root element of the output):",
+                                           text=self.partition_wrapper)
+        if not ok:
+            return
+        filepath, _ = QFileDialog.getSaveFileName(self, "Save Partitioned Output", "",
+                                                  f"XML Files (*.xml);;Compressed XML ({COMPRESSED_XML_PATTERNS});;"
+                                                  "All Files (*)")
+        if not filepath:
+            return
+        self.partition_split_on = split_on = split_on.strip()
+        self.partition_wrapper = wrapper = wrapper.strip()
+
+        self.statusBar().showMessage("Transforming records in parallel worker processes...", MESSAGE_LENGTH)
+        xml_source = xml_file or BytesIO(xml_input.encode('utf-8'))
+        run_in_background(partitioned_transform, self._get_worker_pool(), xslt_input, xml_source, filepath, split_on, chunk_size, wrapper or None, stylesheet_path=self.xslt_file_path,
+                          on_finished=lambda result: self.statusBar().showMessage(
+                              f"Transformed {result[0]} records in {result[1]} chunks to {filepath}", MESSAGE_LENGTH),
+                          on_failed=lambda error: self.statusBar().showMessage(
+                              f"Partitioned Transform Error: {error}", MESSAGE_LENGTH))
+
+    def benchmark(self):
+        xml_input, xml_file = self._xml_input()
+        xslt_input = self.xslt_editor.toPlainText()
+        if (xml_file is None and not xml_input.strip()) or not xslt_input.strip():
+            self.statusBar().showMessage("XML and XSLT inputs cannot be empty.", MESSAGE_LENGTH)
+            return
+        runs, ok = QInputDialog.getInt(self, "Benchmark Transform", "Measured runs:", BENCHMARK_RUNS, 1, 100000)
+        if not ok:
+            return
+        warmup, ok = QInputDialog.getInt(self, "Benchmark Transform", "Warm-up runs (not measured):",
+                                         BENCHMARK_WARMUP_RUNS, 0, 100000)
+        if not ok:
+            return
+
+        self.statusBar().showMessage(f"Benchmarking {warmup} + {runs} transformations...", MESSAGE_LENGTH)
+        run_in_background(benchmark_transform, xslt_input, xml_text=xml_input, xml_file=xml_file,
+                          stylesheet_path=self.xslt_file_path,
+                          runs=runs, warmup=warmup, processor=self.stylesheet_cache.processor,
+                          on_finished=self._show_benchmark_result,
+                          on_failed=lambda error: self.statusBar().showMessage(
+                              f"Benchmark Error: {error}", MESSAGE_LENGTH))
+
+    def _show_benchmark_result(self, result):
+        previous = None
+        try:
+            previous = record_benchmark(result)
+        except OSError as e:
+            print(f"Could not write benchmark history: {e}")
+        self.statusBar().showMessage(f"Benchmark finished: median {result['median_ms']} ms.", MESSAGE_LENGTH)
+        QMessageBox.information(self, "Benchmark Transform", format_benchmark_report(result, previous))
+
+    def _get_worker_pool(self):
+        if self.worker_pool is None:
+            self.worker_pool = TransformWorkerPool()
+        return self.worker_pool
+
+    def toggle_isolated_transform(self, checked):
+        if checked:
+            # Start the workers now so they are warm by the time Transform is clicked.
+            self._get_worker_pool()
+
+    def closeEvent(self, event):
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+        super().closeEvent(event)
+
+    def _choose_schemas(self, title):
+        filepaths, _ = QFileDialog.getOpenFileNames(self, title, "", "XML Schema Files (*.xsd);;All Files (*)")
+        return filepaths
+
+    def set_input_schema(self):
+        filepaths = self._choose_schemas("Select Input Schema(s)")
+        if filepaths:
+            self.input_schema_paths = filepaths
+            self._validate_against_schema(self.xml_editor, self.input_schema_paths, "XML input")
+
+    def set_output_schema(self):
+        filepaths = self._choose_schemas("Select Output Schema(s)")
+        if filepaths:
+            self.output_schema_paths = filepaths
+            self._validate_against_schema(self.output_editor, self.output_schema_paths, "Output")
+
+    def clear_schemas(self):
+        self.input_schema_paths = []
+        self.output_schema_paths = []
+        self.xml_editor.set_diagnostics('schema', {})
+        self.output_editor.set_diagnostics('schema', {})
+        self.statusBar().showMessage("Schemas cleared.", MESSAGE_LENGTH)
+
+    def _validate_against_schema(self, editor, schema_paths, label):
+        if not schema_paths:
+            return
+        xml_file = editor.source_path()
+        text = None
+        if xml_file is None:
+            text = editor.toPlainText()
+            if not text.strip():
+                return
+        revision = editor.document().revision()
+        self.statusBar().showMessage(f"Validating {label}...", MESSAGE_LENGTH)
+        run_in_background(self.schema_cache.validate, schema_paths, text, xml_file,
+                          on_finished=lambda errors: self._show_validation_result(editor, label, revision, errors),
+                          on_failed=lambda error: self.statusBar().showMessage(
+                              f"Schema Error ({label}): {error}", MESSAGE_LENGTH))
+
+    def _show_validation_result(self, editor, label, revision, errors):
+        if editor.document().revision() != revision:
+            return  # The text was edited while validating.
+        markers = {}
+        for line, message in errors:
+            markers[line] = f"{markers[line]}\n{message}" if line in markers else message
+        editor.set_diagnostics('schema', markers)
+        if errors:
+            line, message = errors[0]
+            self.statusBar().showMessage(f"{label} is not valid: {len(errors)} error(s). Line {line}: {message}",
+                                         MESSAGE_LENGTH)
+        else:
+            self.statusBar().showMessage(f"{label} is valid.", MESSAGE_LENGTH)
+
+    def _record_output(self, output):
+        self.previous_output = self.current_output
+        self.current_output = output
+        self.refresh_output_diff()
+
+    def toggle_output_diff(self, checked):
+        self.diff_view.setVisible(checked)
+        self.output_editor.setVisible(not checked)
+        self.refresh_output_diff()
+
+    def refresh_output_diff(self):
+        if not self.show_diff_action.isChecked():
+            return
+        if self.previous_output is None or self.current_output is None:
+            self.diff_view.set_rows([])
+            self.statusBar().showMessage("Run the transformation twice to compare outputs.", MESSAGE_LENGTH)
+            return
+
+        # A newer request cancels the diff in flight, and any result it still delivers is dropped.
+        if self.diff_cancel_event is not None:
+            self.diff_cancel_event.set()
+        self.diff_cancel_event = threading.Event()
+        self.diff_generation += 1
+        generation = self.diff_generation
+        self.statusBar().showMessage("Comparing outputs...", MESSAGE_LENGTH)
+        run_in_background(build_diff_rows, self.previous_output, self.current_output,
+                          self.xml_aware_diff_action.isChecked(), self.diff_cancel_event,
+                          on_finished=lambda rows: self._show_output_diff(generation, rows),
+                          on_failed=lambda error: self.statusBar().showMessage(f"Diff failed: {error}", MESSAGE_LENGTH))
+
+    def _show_output_diff(self, generation, rows):
+        if generation != self.diff_generation or rows is None:
+            return
+        self.diff_view.set_rows(rows)
+        removed = sum(1 for row in rows if row[0] != 'equal' and row[1] is not None)
+        added = sum(1 for row in rows if row[0] != 'equal' and row[3] is not None)
+        self.statusBar().showMessage(f"Output diff: {added} line(s) added, {removed} line(s) removed.", MESSAGE_LENGTH)
+
+
+class ServiceMetrics:
+    """Request counts and recent latencies per endpoint for the HTTP service."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self.endpoints = {}
+
+    def _endpoint(self, name):
+        return self.endpoints.setdefault(name, {'requests': 0, 'errors': 0, 'rejected': 0,
+                                                'latencies': deque(maxlen=SERVICE_LATENCY_SAMPLES)})
+
+    def begin(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def finish(self, name, seconds, ok):
+        with self.lock:
+            self.in_flight -= 1
+            endpoint = self._endpoint(name)
+            endpoint['requests'] += 1
+            if not ok:
+                endpoint['errors'] += 1
+            endpoint['latencies'].append(seconds)
+
+    def reject(self, name):
+        with self.lock:
+            self._endpoint(name)['rejected'] += 1
+
+    def snapshot(self):
+        with self.lock:
+            uptime = time.monotonic() - self.started
+            result = {'uptime_seconds': round(uptime, 3), 'in_flight': self.in_flight, 'endpoints': {}}
+            for name, endpoint in self.endpoints.items():
+                latencies = sorted(endpoint['latencies'])
+                summary = {'requests': endpoint['requests'], 'errors': endpoint['errors'],
+                           'rejected': endpoint['rejected'],
+                           'requests_per_second': round(endpoint['requests'] / uptime, 3) if uptime else 0.0}
+                if latencies:
+                    summary['latency_ms'] = {
+                        'p50': round(percentile(latencies, 0.5) * 1000, 3),
+                        'p95': round(percentile(latencies, 0.95) * 1000, 3),
+                        'max': round(latencies[-1] * 1000, 3),
+                    }
+                result['endpoints'][name] = summary
+            return result
+
+
+class TransformService:
+    """
+    State shared by all requests of the HTTP service: a pool of warm Saxon worker processes
+    (each with its own compiled-stylesheet cache), admission control and metrics.
+    """
+    def __init__(self, workers=TRANSFORM_WORKERS, queue_limit=SERVICE_QUEUE_LIMIT):
+        self.pool = TransformWorkerPool(size=workers)
+        # Requests beyond the workers plus the queue are turned away instead of piling up.
+        self.admission = threading.BoundedSemaphore(workers + queue_limit)
+        self.metrics = ServiceMetrics()
+
+    def handle(self, endpoint, payload):
+        if endpoint == 'transform':
+            stylesheet_text = payload.get('xslt')
+            if stylesheet_text is None:
+                if payload.get('xslt_file') is None:
+                    raise KeyError('xslt')
+                with open(payload['xslt_file'], 'r', encoding='utf-8') as f:
+                    stylesheet_text = f.read()
+            if payload.get('xml') is None and payload.get('xml_file') is None:
+                raise KeyError('xml')
+            output, reused = self.pool.transform(stylesheet_text, xml_text=payload.get('xml'),
+                                                 xml_file=payload.get('xml_file'),
+                                                 stylesheet_path=payload.get('xslt_file'))
+            return {'output': output, 'compiled_stylesheet_reused': reused}
+        if payload.get('xml') is None:
+            raise KeyError('xml')
+        if endpoint == 'format':
+            return {'output': format_xml_string(payload['xml'])}
+        if endpoint == 'xpath':
+            return {'xpath': generate_xpath_at(payload['xml'], payload['line'], payload.get('column', 0))}
+        raise LookupError(endpoint)
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+class TransformRequestHandler(BaseHTTPRequestHandler):
+    """
+    POST /transform {"xml" | "xml_file", "xslt" | "xslt_file"}
+    POST /format    {"xml"}
+    POST /xpath     {"xml", "line", "column"}
+    GET  /metrics, GET /health
+    """
+    server_version = "XSLTTester"
+    endpoints = ('transform', 'format', 'xpath')
+    text_fields = ('xml', 'xml_file', 'xslt', 'xslt_file')
+    number_fields = ('line', 'column')
+
+    def _payload_error(self, payload):
+        """Returns why a decoded request body can't be handled, or None if its fields have the right types."""
+        if not isinstance(payload, dict):
+            return "The request body must be a JSON object."
+        for field in self.text_fields:
+            if payload.get(field) is not None and not isinstance(payload[field], str):
+                return f"Field '{field}' must be a string."
+        for field in self.number_fields:
+            value = payload.get(field, 0)
+            if isinstance(value, bool) or not isinstance(value, int):
+                return f"Field '{field}' must be an integer."
+        return None
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._send_json(200, self.server.service.metrics.snapshot())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        endpoint = self.path.strip('/')
+        if endpoint not in self.endpoints:
+            self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > SERVICE_MAX_REQUEST_BYTES:
+            self._send_json(413, {'error': "Request body too large."})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send_json(400, {'error': f"Invalid JSON: {e}"})
+            return
+        error = self._payload_error(payload)
+        if error:
+            self._send_json(400, {'error': error})
+            return
+
+        service = self.server.service
+        if not service.admission.acquire(blocking=False):
+            service.metrics.reject(endpoint)
+            self._send_json(503, {'error': "Server busy, retry later."}, {'Retry-After': '1'})
+            return
+
+        service.metrics.begin()
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = service.handle(endpoint, payload)
+            ok = True
+        except KeyError as e:
+            status, result = 400, {'error': f"Missing field: {e.args[0]}"}
+        except (TransformWorkerError, etree.XMLSyntaxError, ValueError, OSError) as e:
+            status, result = 422, {'error': str(e)}
+        except Exception as e:
+            # Anything unexpected still gets an answer rather than a dropped connection.
+            status, result = 500, {'error': f"Internal error: {e}"}
+        finally:
+            service.admission.release()
+            elapsed = time.perf_counter() - started
+            service.metrics.finish(endpoint, elapsed, ok)
+        if ok:
+            status = 200
+            result['elapsed_ms'] = round(elapsed * 1000, 3)
+        self._send_json(status, result)
+
+    def log_message(self, format, *args):
+        pass  # Per-request logging would dominate the output under load; see /metrics instead.
+
+def run_server(args):
+    service = TransformService(workers=args.workers, queue_limit=args.queue)
+    server = ThreadingHTTPServer((args.host, args.port), TransformRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    print(f"XSLT Tester service listening on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(description="XSLT Tester")
+    parser.add_argument('--export-xpaths', metavar='XML_FILE',
+                        help="Write the XPath of every element and attribute in XML_FILE and exit.")
+    parser.add_argument('--format', choices=['csv', 'jsonl'],
+                        help="Output format for --export-xpaths (default: from the output extension, else csv).")
+    parser.add_argument('--output', metavar='FILE', help="Output file (default: standard output).")
+    parser.add_argument('--serve', action='store_true',
+                        help="Run a local HTTP service with transform, format and XPath endpoints instead of the GUI.")
+    parser.add_argument('--host', default='127.0.0.1', help="Address for --serve (default: 127.0.0.1).")
+    parser.add_argument('--port', type=int, default=SERVICE_DEFAULT_PORT,
+                        help=f"Port for --serve (default: {SERVICE_DEFAULT_PORT}).")
+    parser.add_argument('--workers', type=int, default=TRANSFORM_WORKERS,
+                        help=f"Number of transform worker processes (default: {TRANSFORM_WORKERS}).")
+    parser.add_argument('--queue', type=int, default=SERVICE_QUEUE_LIMIT,
+                        help=f"Requests allowed to wait for a worker before the service answers 503 "
+                             f"(default: {SERVICE_QUEUE_LIMIT}).")
+    parser.add_argument('--transform', nargs=2, metavar=('XML_FILE', 'XSLT_FILE'),
+                        help="Transform XML_FILE with XSLT_FILE to --output and exit.")
+    parser.add_argument('--split-on', metavar='RECORD',
+                        help="With --transform: transform the RECORD elements (a name or an absolute path) in chunks "
+                             "on parallel worker processes and merge the results.")
+    parser.add_argument('--chunk-size', type=int, default=PARTITION_CHUNK_RECORDS,
+                        help=f"Records per chunk for --split-on (default: {PARTITION_CHUNK_RECORDS}).")
+    parser.add_argument('--wrapper', metavar='ELEMENT',
+                        help="Root element of the merged --split-on output (default: root element of the output).")
+    parser.add_argument('--benchmark', nargs=2, metavar=('XML_FILE', 'XSLT_FILE'),
+                        help="Time repeated transformations of XML_FILE with XSLT_FILE and exit.")
+    parser.add_argument('--runs', type=int, default=BENCHMARK_RUNS,
+                        help=f"Measured runs for --benchmark (default: {BENCHMARK_RUNS}).")
+    parser.add_argument('--warmup', type=int, default=BENCHMARK_WARMUP_RUNS,
+                        help=f"Unmeasured warm-up runs for --benchmark (default: {BENCHMARK_WARMUP_RUNS}).")
+    # Unknown arguments are left for Qt.
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def run_export_xpaths(args):
+    try:
+        if args.output:
+            count = export_xpaths_to_file(args.output, args.format, xml_file=args.export_xpaths)
+        else:
+            with open_xml_input(args.export_xpaths) as f:
+                root = etree.parse(f, etree.XMLParser(huge_tree=True)).getroot()
+            count = export_xpaths(root, sys.stdout, args.format or 'csv')
+    except Exception as e:
+        print(f"Export XPaths Error: {e}", file=sys.stderr)
+        return 1
+    print(f"Exported {count} XPaths.", file=sys.stderr)
+    return 0
+
+def run_transform(args):
+    xml_file, stylesheet_path = args.transform
+    output_file = args.output or sys.stdout.buffer
+    try:
+        with open(stylesheet_path, 'r', encoding='utf-8') as f:
+            stylesheet_text = f.read()
+        if args.split_on:
+            pool = TransformWorkerPool(size=args.workers)
+            try:
+                record_count, chunk_count = partitioned_transform(pool, stylesheet_text, xml_file, output_file,
+                                                                  args.split_on, args.chunk_size, args.wrapper,
+                                                                  stylesheet_path=stylesheet_path)
+            finally:
+                pool.shutdown()
+            print(f"Transformed {record_count} records in {chunk_count} chunks.", file=sys.stderr)
+            return 0
+
+        processor = PySaxonProcessor(license=False)
+        executable = compile_stylesheet(processor, stylesheet_text, stylesheet_path)
+        document = parse_xml_input(processor, xml_file=xml_file)
+        if not document:
+            raise ValueError("Error parsing XML.")
+        output = executable.transform_to_string(xdm_node=document) or ""
+        if args.output:
+            with open_output_file(args.output, encoding='utf-8') as f:
+                f.write(output)
+        else:
+            sys.stdout.write(output)
+    except Exception as e:
+        print(f"Transform Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+def run_benchmark(args):
+    xml_file, stylesheet_path = args.benchmark
+    try:
+        with open(stylesheet_path, 'r', encoding='utf-8') as f:
+            stylesheet_text = f.read()
+        result = benchmark_transform(stylesheet_text, xml_file=xml_file, stylesheet_path=stylesheet_path,
+                                     runs=args.runs, warmup=args.warmup)
+    except Exception as e:
+        print(f"Benchmark Error: {e}", file=sys.stderr)
+        return 1
+    previous = None
+    try:
+        previous = record_benchmark(result)
+    except OSError as e:
+        print(f"Could not write benchmark history: {e}", file=sys.stderr)
+    print(format_benchmark_report(result, previous))
+    return 0
 
 
 if __name__ == '__main__':
+    # In a frozen build, worker processes start this executable; this runs the worker instead of the app.
+    multiprocessing.freeze_support()
+    args = parse_command_line(sys.argv[1:])
+    if args.export_xpaths:
+        sys.exit(run_export_xpaths(args))
+    if args.serve:
+        sys.exit(run_server(args))
+    if args.transform:
+        sys.exit(run_transform(args))
+    if args.benchmark:
+        sys.exit(run_benchmark(args))
+
     app = QApplication(sys.argv)
     main_win = MainWindow()
     main_win.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())